@@ -5,11 +5,14 @@ Scraper Twitter via Google Search (site:twitter.com)
 Veille OpenClaw & Claude Code
 """
 
-import requests
-from bs4 import BeautifulSoup
+import veille_dedup
+import veille_http
+import veille_output
+import veille_parse
+import veille_summaries
+import veille_urls
 import json
 from datetime import datetime
-import time
 import re
 
 # Keywords à surveiller
@@ -29,52 +32,41 @@ def scrape_twitter_google(keyword, max_results=20):
         url = f"https://www.google.com/search?q={search_query.replace(' ', '+')}&num=20"
         
         headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         }
         
-        response = requests.get(url, headers=headers, timeout=15)
+        response = veille_http.get(url, headers=headers, timeout=15)
         
         if response.status_code != 200:
             print(f"  ⚠️ Google returned status {response.status_code}")
             return tweets
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find all search result containers
-        results = soup.find_all('div', class_='g')
+        # Find all search result containers (title, url, snippet)
+        results = veille_parse.parse_google_results(response.text)
         
         print(f"  Found {len(results)} Google results")
         
         for result in results[:max_results]:
             try:
                 # Extract link
-                link_elem = result.find('a')
-                if not link_elem:
+                url = result['url']
+                if not url:
                     continue
                 
-                url = link_elem.get('href', '')
-                
                 # Only twitter.com links
                 if 'twitter.com' not in url and 'x.com' not in url:
                     continue
                 
-                # Extract username from URL
+                # Extract username from URL, store the canonical twitter.com URL
                 # Format: https://twitter.com/username/status/1234567890
-                username_match = re.search(r'(?:twitter\.com|x\.com)/([^/]+)/status', url)
-                username = username_match.group(1) if username_match else 'Unknown'
-                
-                # Extract title (tweet preview from Google)
-                title_elem = result.find('h3')
-                title = title_elem.get_text(strip=True) if title_elem else ''
+                username = veille_urls.tweet_username(url) or 'Unknown'
+                url = veille_urls.canonical_url(url)
                 
-                # Extract snippet (tweet content preview)
-                snippet_elem = result.find('div', class_='VwiC3b') or result.find('span', class_='st')
-                snippet = snippet_elem.get_text(strip=True) if snippet_elem else ''
+                # Title (tweet preview from Google) and snippet (tweet content preview)
+                title = result['title']
+                snippet = result['snippet']
                 
                 # Combine title and snippet for content
                 content = f"{title}\n{snippet}".strip()
@@ -164,7 +156,16 @@ Format JSON strict (ne retourne QUE le JSON, rien d'autre):
             ]
         }
         
-        response = requests.post(
+        # Same inputs (tweets, prompt template, model) as a previous run: no API call
+        summary_key = veille_summaries.cache_key(
+            data['model'], prompt, max_tokens=data['max_tokens'], temperature=data.get('temperature')
+        )
+        cached_summary = veille_summaries.lookup(summary_key)
+        if cached_summary:
+            print("✓ AI summary unchanged (cache)")
+            return cached_summary
+        
+        response = veille_http.post(
             'https://api.anthropic.com/v1/messages',
             headers=headers,
             json=data,
@@ -180,6 +181,7 @@ Format JSON strict (ne retourne QUE le JSON, rien d'autre):
             if json_match:
                 summary_data = json.loads(json_match.group())
                 print("✓ AI summary generated")
+                veille_summaries.store(summary_key, summary_data)
                 return summary_data
             else:
                 # Fallback: use raw text
@@ -216,16 +218,17 @@ def main():
         print(f"\n🔍 Scraping Twitter (via Google) for: {keyword}")
         tweets = scrape_twitter_google(keyword)
         all_tweets.extend(tweets)
-        time.sleep(3)  # Rate limiting entre keywords
     
-    # Deduplication par URL
-    seen_urls = set()
+    # Deduplication par tweet (twitter.com et x.com -> même clé entière)
+    seen_keys = set()
     unique_tweets = []
     
     for tweet in all_tweets:
-        url = tweet.get('url', '')
-        if url and url not in seen_urls:
-            seen_urls.add(url)
+        if not tweet.get('url'):
+            continue
+        key = veille_dedup.item_key(tweet)
+        if key not in seen_keys:
+            seen_keys.add(key)
             unique_tweets.append(tweet)
     
     print(f"\n📊 Total unique tweets: {len(unique_tweets)}")
@@ -245,18 +248,12 @@ def main():
         }
     }
     
-    # Save to file
-    output_file = 'veille-latest.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
-    
-    print(f"\n✓ Data saved to {output_file}")
-    
-    # Also save daily archive
+    # Save to file (serialized once, atomic, daily archive as a hard link)
+    output_file = veille_output.LATEST_FILE
     daily_file = f"veille-{datetime.now().strftime('%Y-%m-%d')}.json"
-    with open(daily_file, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    veille_output.write_json(result, output_file, daily_file, compress=True)
     
+    print(f"\n✓ Data saved to {output_file}")
     print(f"✓ Daily archive: {daily_file}")
     
     # Summary
@@ -5,12 +5,15 @@ Scraper Twitter Only avec Résumé IA en Français
 Veille OpenClaw & Claude Code
 """
 
-import requests
-from bs4 import BeautifulSoup
+import veille_dedup
+import veille_http
+import veille_output
+import veille_parse
+import veille_summaries
+import veille_urls
 import json
 from datetime import datetime
 import os
-import time
 
 # Keywords à surveiller
 KEYWORDS = [
@@ -35,11 +38,7 @@ def scrape_twitter_syndication(keyword, max_results=10):
         # Twitter Syndication API (public, pas d'auth requise)
         url = f"https://cdn.syndication.twimg.com/widgets/followbutton/info.json?screen_names=anthropic,OpenClawAI&count=10"
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
+        response = veille_http.get(url, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -68,37 +67,27 @@ def scrape_twitter_nitter(keyword, max_results=10):
             # Search URL
             search_url = f"{instance}/search?f=tweets&q={keyword.replace(' ', '+')}"
             
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(search_url, headers=headers, timeout=10)
+            response = veille_http.get(search_url, timeout=10)
             
             if response.status_code != 200:
                 continue
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
             # Find tweet containers
-            tweet_containers = soup.find_all('div', class_='timeline-item')
+            tweet_containers = veille_parse.parse_nitter_timeline(response.text)
             
             for container in tweet_containers[:max_results]:
                 try:
                     # Extract username
-                    username_elem = container.find('a', class_='username')
-                    username = username_elem.get('title', '').lstrip('@') if username_elem else 'Unknown'
+                    username = container['username_title'].lstrip('@') if container['username'] is not None else 'Unknown'
                     
                     # Extract content
-                    content_elem = container.find('div', class_='tweet-content')
-                    content = content_elem.get_text(strip=True) if content_elem else ''
+                    content = container['content'] or ''
                     
                     # Extract date
-                    date_elem = container.find('span', class_='tweet-date')
-                    date = date_elem.get_text(strip=True) if date_elem else datetime.now().isoformat()
+                    date = container['date'] if container['date'] is not None else datetime.now().isoformat()
                     
                     # Extract URL
-                    link_elem = container.find('a', class_='tweet-link')
-                    tweet_url = instance + link_elem.get('href', '') if link_elem else ''
+                    tweet_url = instance + container['link'] if container['link'] is not None else ''
                     
                     if content:
                         tweets.append({
@@ -106,7 +95,7 @@ def scrape_twitter_nitter(keyword, max_results=10):
                             'content': content,
                             'date': date,
                             'keyword': keyword,
-                            'url': tweet_url.replace(instance, 'https://twitter.com')
+                            'url': veille_urls.canonical_url(tweet_url)
                         })
                 
                 except Exception as e:
@@ -131,31 +120,17 @@ def scrape_twitter_google(keyword, max_results=10):
         search_query = f"site:twitter.com {keyword}"
         url = f"https://www.google.com/search?q={search_query.replace(' ', '+')}"
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
+        response = veille_http.get(url, timeout=10)
         
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find search results
-            results = soup.find_all('div', class_='g')
+            # Find search results (title, url, snippet)
+            results = veille_parse.parse_google_results(response.text)
             
             for result in results[:max_results]:
                 try:
-                    # Extract title
-                    title_elem = result.find('h3')
-                    title = title_elem.get_text(strip=True) if title_elem else ''
-                    
-                    # Extract URL
-                    link_elem = result.find('a')
-                    url = link_elem.get('href', '') if link_elem else ''
-                    
-                    # Extract snippet
-                    snippet_elem = result.find('div', class_='VwiC3b')
-                    snippet = snippet_elem.get_text(strip=True) if snippet_elem else ''
+                    title = result['title']
+                    url = veille_urls.canonical_url(result['url'])
+                    snippet = result['snippet']
                     
                     if 'twitter.com' in url and (title or snippet):
                         tweets.append({
@@ -200,15 +175,8 @@ def scrape_twitter_multi_source(keyword):
         all_tweets.extend(tweets_google)
         print(f"    Found {len(tweets_google)} tweets")
     
-    # Deduplication by content
-    seen = set()
-    unique_tweets = []
-    
-    for tweet in all_tweets:
-        content_hash = tweet['content'][:100]  # First 100 chars
-        if content_hash not in seen:
-            seen.add(content_hash)
-            unique_tweets.append(tweet)
+    # Deduplication by content (near-duplicates: Google snippet vs Nitter text)
+    unique_tweets = veille_dedup.dedupe(all_tweets)
     
     print(f"  ✓ Total unique tweets: {len(unique_tweets)}")
     
@@ -277,7 +245,16 @@ Format JSON attendu:
             ]
         }
         
-        response = requests.post(
+        # Same inputs (tweets, prompt template, model) as a previous run: no API call
+        summary_key = veille_summaries.cache_key(
+            data['model'], prompt, max_tokens=data['max_tokens'], temperature=data.get('temperature')
+        )
+        cached_summary = veille_summaries.lookup(summary_key)
+        if cached_summary:
+            print("✓ AI summary unchanged (cache)")
+            return cached_summary
+        
+        response = veille_http.post(
             'https://api.anthropic.com/v1/messages',
             headers=headers,
             json=data,
@@ -294,6 +271,7 @@ Format JSON attendu:
             if json_match:
                 summary_data = json.loads(json_match.group())
                 print("✓ AI summary generated")
+                veille_summaries.store(summary_key, summary_data)
                 return summary_data
             else:
                 # Fallback: use raw text
@@ -329,17 +307,9 @@ def main():
     for keyword in KEYWORDS:
         tweets = scrape_twitter_multi_source(keyword)
         all_tweets.extend(tweets)
-        time.sleep(2)  # Rate limiting
     
-    # Deduplication finale
-    seen = set()
-    unique_tweets = []
-    
-    for tweet in all_tweets:
-        content_hash = tweet['content'][:100]
-        if content_hash not in seen:
-            seen.add(content_hash)
-            unique_tweets.append(tweet)
+    # Deduplication finale (quasi-doublons entre keywords)
+    unique_tweets = veille_dedup.dedupe(all_tweets)
     
     print(f"\n📊 Total unique tweets: {len(unique_tweets)}")
     
@@ -358,18 +328,12 @@ def main():
         }
     }
     
-    # Save to file
-    output_file = 'veille-latest.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
-    
-    print(f"\n✓ Data saved to {output_file}")
-    
-    # Also save daily archive
+    # Save to file (serialized once, atomic, daily archive as a hard link)
+    output_file = veille_output.LATEST_FILE
     daily_file = f"veille-{datetime.now().strftime('%Y-%m-%d')}.json"
-    with open(daily_file, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    veille_output.write_json(result, output_file, daily_file, compress=True)
     
+    print(f"\n✓ Data saved to {output_file}")
     print(f"✓ Daily archive: {daily_file}")
     
     # Summary
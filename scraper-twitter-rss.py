@@ -5,11 +5,23 @@ Scraper Twitter via RSS Feeds (Nitter)
 Veille OpenClaw & Claude Code
 """
 
-import requests
-from bs4 import BeautifulSoup
+import veille_dedup
+import veille_http
+import veille_nitter
+import veille_output
+import veille_parse
+import veille_schedule
+import veille_state
+import veille_summaries
+import veille_urls
+import argparse
+import glob
+import hashlib
 import json
+import os
+import subprocess
+import sys
 from datetime import datetime
-import time
 import re
 
 # Load accounts from config file
@@ -38,90 +50,135 @@ NITTER_INSTANCES = [
     "https://nitter.privacydev.net",
 ]
 
+# Instances ordonnées par santé, requête de secours si la première tarde
+NITTER_POOL = veille_nitter.InstancePool(NITTER_INSTANCES, hedge=True)
+
+# Cache ETag / Last-Modified des flux RSS (tweets parsés resservis sur 304)
+RSS_CACHE = veille_http.ValidatorCache('rss-validators.json')
+
 def scrape_twitter_rss(username, nitter_instance, max_tweets=20):
-    """Scrape Twitter account via Nitter RSS"""
+    """
+    Scrape Twitter account via Nitter RSS
+    The feed is parsed as it streams in and reading stops after max_tweets
+    or at the first tweet already cached from the previous run.
+    Returns None when the instance failed ([] is a feed with no tweets).
+    """
     tweets = []
     
     try:
         # Nitter RSS URL
         rss_url = f"{nitter_instance}/{username}/rss"
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(rss_url, headers=headers, timeout=15)
-        
-        if response.status_code != 200:
-            print(f"  ⚠️ Nitter returned status {response.status_code}")
-            return tweets
-        
-        # Parse RSS XML
-        soup = BeautifulSoup(response.text, 'xml')
+        response, cached_tweets = veille_http.conditional_get(rss_url, RSS_CACHE, timeout=15, stream=True)
         
-        # Find all items (tweets)
-        items = soup.find_all('item')
-        
-        print(f"  Found {len(items)} tweets in RSS")
-        
-        for item in items[:max_tweets]:
-            try:
-                # Extract title (tweet content)
-                title_elem = item.find('title')
-                title = title_elem.get_text(strip=True) if title_elem else ''
-                
-                # Extract description (full tweet with media)
-                desc_elem = item.find('description')
-                description = desc_elem.get_text(strip=True) if desc_elem else ''
-                
-                # Extract link
-                link_elem = item.find('link')
-                link = link_elem.get_text(strip=True) if link_elem else ''
-                
-                # Extract pub date
-                pubdate_elem = item.find('pubDate')
-                pubdate = pubdate_elem.get_text(strip=True) if pubdate_elem else datetime.now().isoformat()
-                
-                # Combine title and description for content
-                content = f"{title}\n{description}".strip()
-                
-                # Clean HTML tags from content
-                content = re.sub(r'<[^>]+>', '', content)
+        with response:
+            if response.status_code == 304:
+                tweets = cached_tweets or []
+                print(f"  ✓ Feed unchanged (304), {len(tweets)} cached tweets for @{username}")
+                return tweets
+            
+            if response.status_code != 200:
+                print(f"  ⚠️ Nitter returned status {response.status_code}")
+                return None
+            
+            # Tweets from the previous run: stop reading once we reach one of them
+            previous_tweets = RSS_CACHE.payload(rss_url) or []
+            known_urls = {tweet['url'] for tweet in previous_tweets}
+            reached_known = False
+            
+            # Parse RSS XML (streaming, gzip decoded on the fly)
+            response.raw.decode_content = True
+            
+            for item in veille_parse.iter_rss_items(response.raw):
+                try:
+                    # Combine title (tweet content) and description (full tweet with media)
+                    content = f"{item['title']}\n{item['description']}".strip()
+                    
+                    # Clean HTML tags from content
+                    content = re.sub(r'<[^>]+>', '', content)
+                    
+                    url = veille_urls.canonical_url(item['link'].replace(nitter_instance, 'https://twitter.com'))
+                    
+                    if url and url in known_urls:
+                        reached_known = True
+                        break
+                    
+                    if content and len(content) > 10:
+                        tweets.append({
+                            'username': username,
+                            'content': content[:500],  # Limit content length
+                            'date': item['pubDate'] or datetime.now().isoformat(),
+                            'url': url,
+                            'source': 'rss'
+                        })
+                    
+                    if len(tweets) >= max_tweets:
+                        break
                 
-                if content and len(content) > 10:
-                    tweets.append({
-                        'username': username,
-                        'content': content[:500],  # Limit content length
-                        'date': pubdate,
-                        'url': link.replace(nitter_instance, 'https://twitter.com'),
-                        'source': 'rss'
-                    })
+                except Exception as e:
+                    print(f"  Error parsing tweet: {e}")
+                    continue
             
-            except Exception as e:
-                print(f"  Error parsing tweet: {e}")
-                continue
+            new_count = len(tweets)
+            if reached_known:
+                tweets = (tweets + previous_tweets)[:max_tweets]
+            
+            RSS_CACHE.store(rss_url, response, tweets)
         
-        print(f"  ✓ Extracted {len(tweets)} tweets from @{username}")
+        print(f"  ✓ Extracted {new_count} new tweets from @{username} ({len(tweets)} total)")
         
     except Exception as e:
         print(f"  ❌ RSS fetch error for @{username}: {e}")
+        return None
     
     return tweets
 
 def scrape_account_multi_instance(username):
-    """Try multiple Nitter instances for an account"""
+    """
+    Try Nitter instances for an account, healthiest first
+    Returns None when every instance failed
+    """
     
-    for instance in NITTER_INSTANCES:
-        print(f"  → Trying {instance}...")
-        tweets = scrape_twitter_rss(username, instance)
-        
+    return NITTER_POOL.fetch(lambda instance: scrape_twitter_rss(username, instance))
+
+def cached_account_tweets(username):
+    """Tweets of an account from the last successful fetch (no request)"""
+    for instance in NITTER_POOL.ordered():
+        tweets = RSS_CACHE.payload(f"{instance}/{username}/rss")
         if tweets:
             return tweets
-        
-        time.sleep(1)  # Rate limiting between instances
-    
     return []
 
+def collect_tweets(accounts, schedule=None):
+    """
+    Tweets of all accounts. With a schedule, only accounts that are due are
+    fetched (prolific ones often, quiet ones rarely); the others, and
+    accounts no instance could fetch, are served from the RSS cache.
+    """
+    due = set(schedule.due(accounts)) if schedule else set(accounts)
+    if schedule:
+        print(f"📅 {len(due)}/{len(accounts)} accounts due for polling")
+    
+    all_tweets = []
+    for username in accounts:
+        if username in due:
+            print(f"\n📡 Fetching RSS for @{username}...")
+            tweets = scrape_account_multi_instance(username)
+            if tweets is None:
+                # Every instance failed: says nothing about the posting rate
+                print(f"  ⚠️ No instance available for @{username}, using cached tweets")
+                tweets = cached_account_tweets(username)
+            elif schedule:
+                schedule.observe(username, tweets)
+        else:
+            tweets = cached_account_tweets(username)
+        all_tweets.extend(tweets)
+    
+    if schedule:
+        schedule.save()
+    
+    return all_tweets
+
 def generate_ai_summary(tweets):
     """Génère un résumé IA en français via OpenRouter"""
     
@@ -192,7 +249,16 @@ Format JSON strict (ne retourne QUE le JSON):
             'max_tokens': 1024
         }
         
-        response = requests.post(
+        # Same inputs (tweets, prompt template, model) as a previous run: no API call
+        summary_key = veille_summaries.cache_key(
+            data['model'], prompt, max_tokens=data['max_tokens'], temperature=data.get('temperature')
+        )
+        cached_summary = veille_summaries.lookup(summary_key)
+        if cached_summary:
+            print("✓ AI summary unchanged (cache)")
+            return cached_summary
+        
+        response = veille_http.post(
             url,
             headers=headers,
             json=data,
@@ -208,6 +274,7 @@ Format JSON strict (ne retourne QUE le JSON):
             if json_match:
                 summary_data = json.loads(json_match.group())
                 print("✓ AI summary generated (OpenRouter)")
+                veille_summaries.store(summary_key, summary_data)
                 return summary_data
             else:
                 return {
@@ -232,28 +299,131 @@ Format JSON strict (ne retourne QUE le JSON):
             'trends': []
         }
 
+# Sharded runs: accounts split across worker processes (or machines sharing
+# a work directory); each shard gets 1/N of every host's rate-limit budget,
+# so N shards together still respect the per-host limit
+SHARD_WORKDIR = os.path.join(veille_state.STATE_DIR, 'shards')
+
+def shard_accounts(accounts, index, count):
+    """Accounts of shard index/count (stable hash, independent of list order)"""
+    return [
+        username for username in accounts
+        if int.from_bytes(hashlib.blake2b(username.lower().encode('utf-8'), digest_size=8).digest(), 'big') % count == index
+    ]
+
+def shard_file(workdir, index, count):
+    return os.path.join(workdir, f'shard-{index}-of-{count}.json')
+
+def run_shard(index, count, workdir, schedule=None):
+    """Fetch one shard's accounts and write its tweets to the work directory"""
+    accounts = shard_accounts(TWITTER_ACCOUNTS, index, count)
+    print(f"🧩 Shard {index}/{count}: {len(accounts)} accounts")
+    
+    # All shards hit the same Nitter instances: split each host's budget
+    veille_http.RATE_LIMITER.set_share(count)
+    
+    tweets = collect_tweets(accounts, schedule)
+    RSS_CACHE.save()
+    NITTER_POOL.save()
+    
+    os.makedirs(workdir, exist_ok=True)
+    veille_output.write_json({'accounts': accounts, 'tweets': tweets}, shard_file(workdir, index, count))
+
+def merge_shards(workdir, count):
+    """
+    Tweets of all shards, in twitter-accounts.json order whatever the shard
+    completion order (deterministic output)
+    """
+    by_account = {}
+    for index in range(count):
+        path = shard_file(workdir, index, count)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                shard = json.load(f)
+        except FileNotFoundError:
+            print(f"⚠️ Missing shard {index}/{count} ({path}), its accounts are skipped")
+            continue
+        
+        for username in shard['accounts']:
+            by_account[username] = []
+        for tweet in shard['tweets']:
+            by_account.setdefault(tweet.get('username'), []).append(tweet)
+    
+    return [tweet for username in TWITTER_ACCOUNTS for tweet in by_account.get(username, [])]
+
+def run_sharded(count, workdir, poll_all=False):
+    """Run `count` shard worker processes in parallel, then merge their output"""
+    for path in glob.glob(os.path.join(workdir, f'shard-*-of-{count}.json')):
+        os.remove(path)
+    
+    workers = []
+    for index in range(count):
+        command = [sys.executable, os.path.abspath(__file__), '--shard', f'{index}/{count}', '--workdir', workdir]
+        if poll_all:
+            command.append('--all')
+        workers.append(subprocess.Popen(command))
+    
+    for index, worker in enumerate(workers):
+        if worker.wait() != 0:
+            print(f"⚠️ Shard {index}/{count} exited with code {worker.returncode}")
+    
+    return merge_shards(workdir, count)
+
+def parse_shard(value):
+    index, _, count = value.partition('/')
+    if not (index.isdigit() and count.isdigit()) or int(index) >= int(count):
+        raise argparse.ArgumentTypeError(f"expected i/N with 0 <= i < N, got {value}")
+    return int(index), int(count)
+
 def main():
+    parser = argparse.ArgumentParser(description="Veille Twitter via les flux RSS Nitter")
+    parser.add_argument('--all', action='store_true',
+                        help="poll every account, ignoring the adaptive schedule")
+    parser.add_argument('--shards', type=int, metavar='N',
+                        help="split accounts across N worker processes, then merge")
+    parser.add_argument('--shard', type=parse_shard, metavar='i/N',
+                        help="worker mode: fetch shard i of N into --workdir, no output files")
+    parser.add_argument('--merge', type=int, metavar='N',
+                        help="merge the N shard files of --workdir and write the output")
+    parser.add_argument('--workdir', default=SHARD_WORKDIR,
+                        help=f"shard work directory, may be shared between machines (default {SHARD_WORKDIR})")
+    args = parser.parse_args()
+    
+    schedule = None if args.all else veille_schedule.AccountSchedule()
+    
+    if args.shard:
+        run_shard(*args.shard, args.workdir, schedule)
+        return
+    
     print("=" * 60)
     print("🔍 VEILLE TWITTER RSS - COMPTES SPÉCIFIQUES")
     print("=" * 60)
     
-    all_tweets = []
+    if args.merge:
+        all_tweets = merge_shards(args.workdir, args.merge)
+    elif args.shards and args.shards > 1:
+        all_tweets = run_sharded(args.shards, args.workdir, poll_all=args.all)
+    else:
+        # Scrape each Twitter account that is due (adaptive per-account schedule)
+        all_tweets = collect_tweets(TWITTER_ACCOUNTS, schedule)
+        RSS_CACHE.save()
+        NITTER_POOL.save()
     
-    # Scrape each Twitter account
-    for username in TWITTER_ACCOUNTS:
-        print(f"\n📡 Fetching RSS for @{username}...")
-        tweets = scrape_account_multi_instance(username)
-        all_tweets.extend(tweets)
-        time.sleep(2)  # Rate limiting between accounts
+    publish(all_tweets)
+
+def publish(all_tweets):
+    """Dedup, sort, summarize and write the output files"""
     
-    # Deduplication by URL
-    seen_urls = set()
+    # Deduplication by tweet (canonical integer key rather than URL string)
+    seen_keys = set()
     unique_tweets = []
     
     for tweet in all_tweets:
-        url = tweet.get('url', '')
-        if url and url not in seen_urls:
-            seen_urls.add(url)
+        if not tweet.get('url'):
+            continue
+        key = veille_dedup.item_key(tweet)
+        if key not in seen_keys:
+            seen_keys.add(key)
             unique_tweets.append(tweet)
     
     print(f"\n📊 Total unique tweets: {len(unique_tweets)}")
@@ -282,18 +452,12 @@ def main():
         }
     }
     
-    # Save to file
-    output_file = 'veille-latest.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
-    
-    print(f"\n✓ Data saved to {output_file}")
-    
-    # Also save daily archive
+    # Save to file (serialized once, atomic, daily archive as a hard link)
+    output_file = veille_output.LATEST_FILE
     daily_file = f"veille-{datetime.now().strftime('%Y-%m-%d')}.json"
-    with open(daily_file, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    veille_output.write_json(result, output_file, daily_file, compress=True)
     
+    print(f"\n✓ Data saved to {output_file}")
     print(f"✓ Daily archive: {daily_file}")
     
     # Summary
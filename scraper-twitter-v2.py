@@ -5,12 +5,12 @@ Utilise plusieurs méthodes pour garantir des résultats
 """
 
 import requests
-from bs4 import BeautifulSoup
-import json
+import veille_dedup
+import veille_http
+import veille_output
+import veille_parse
+import veille_urls
 from datetime import datetime
-import time
-import random
-import re
 
 # Configuration
 KEYWORDS = [
@@ -35,11 +35,10 @@ def search_twitter_syndication(keyword, max_tweets=15):
         url = f"https://cdn.syndication.twimg.com/srv/timeline-profile/screen-name/search?q={encoded_keyword}&count={max_tweets}"
         
         headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
             'Referer': 'https://twitter.com/'
         }
         
-        response = requests.get(url, headers=headers, timeout=15)
+        response = veille_http.get(url, headers=headers, timeout=15)
         
         if response.status_code == 200:
             data = response.json()
@@ -84,28 +83,19 @@ def search_nitter_fallback(keyword, max_tweets=15):
         try:
             search_url = f"{instance}/search?f=tweets&q={keyword.replace(' ', '%20')}"
             
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(search_url, headers=headers, timeout=10)
+            response = veille_http.get(search_url, timeout=10)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                tweet_containers = soup.select('.timeline-item')
+                tweet_containers = veille_parse.parse_nitter_timeline(response.text)
                 
                 for container in tweet_containers[:max_tweets]:
                     try:
-                        username_elem = container.select_one('.username')
-                        content_elem = container.select_one('.tweet-content')
-                        date_elem = container.select_one('.tweet-date a')
-                        
-                        if username_elem and content_elem:
+                        if container['username'] is not None and container['content'] is not None:
                             tweet = {
-                                'username': username_elem.text.strip(),
-                                'content': content_elem.get_text(strip=True),
-                                'date': date_elem.get('title', 'Récent') if date_elem else 'Récent',
+                                'username': container['username'],
+                                'content': container['content'],
+                                'date': container['date_title'] or 'Récent',
+                                'url': veille_urls.canonical_url(instance + container['link']) if container['link'] else '',
                                 'keyword': keyword,
                                 'timestamp': datetime.now().isoformat(),
                                 'source': f'nitter_{instance.split("//")[1].split(".")[0]}'
@@ -121,8 +111,6 @@ def search_nitter_fallback(keyword, max_tweets=15):
         except Exception as e:
             print(f"⚠️  {instance} échoué: {e}")
             continue
-        
-        time.sleep(random.uniform(1, 2))
     
     return tweets
 
@@ -137,35 +125,25 @@ def search_twitter_via_google(keyword, max_results=10):
         google_query = f"site:twitter.com {keyword}"
         google_url = f"https://www.google.com/search?q={requests.utils.quote(google_query)}&num={max_results}"
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(google_url, headers=headers, timeout=10)
+        response = veille_http.get(google_url, timeout=10)
         
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
             # Parse résultats Google
-            search_results = soup.select('.g')
+            search_results = veille_parse.parse_google_results(response.text)
             
             for result in search_results[:max_results]:
                 try:
-                    link_elem = result.select_one('a')
-                    snippet_elem = result.select_one('.VwiC3b')
-                    
-                    if link_elem and snippet_elem:
-                        url = link_elem.get('href', '')
+                    if result['url'] and result['snippet']:
+                        # Vérifier que c'est bien un tweet (twitter.com ou x.com)
+                        tweet_id = veille_urls.canonical_key(result['url'])
                         
-                        # Vérifier que c'est bien un tweet
-                        if 'twitter.com/' in url and '/status/' in url:
-                            # Extraire username depuis URL
-                            username_match = re.search(r'twitter\.com/([^/]+)/', url)
-                            username = '@' + username_match.group(1) if username_match else '@unknown'
+                        if tweet_id and tweet_id[0] == 'twitter':
+                            url = veille_urls.canonical_url(result['url'])
+                            username = '@' + veille_urls.tweet_username(url)
                             
                             tweet = {
                                 'username': username,
-                                'content': snippet_elem.get_text(strip=True),
+                                'content': result['snippet'],
                                 'date': 'Via Google',
                                 'url': url,
                                 'keyword': keyword,
@@ -194,28 +172,19 @@ def scrape_twitter_all_methods(keyword):
     # Méthode 1 : Syndication API (prioritaire)
     tweets_syndication = search_twitter_syndication(keyword, max_tweets=10)
     all_tweets.extend(tweets_syndication)
-    time.sleep(random.uniform(2, 4))
     
     # Méthode 2 : Nitter (si Syndication a échoué ou peu de résultats)
     if len(all_tweets) < 5:
         tweets_nitter = search_nitter_fallback(keyword, max_tweets=10)
         all_tweets.extend(tweets_nitter)
-        time.sleep(random.uniform(2, 4))
     
     # Méthode 3 : Google (complément)
     if len(all_tweets) < 8:
         tweets_google = search_twitter_via_google(keyword, max_results=5)
         all_tweets.extend(tweets_google)
     
-    # Dédupliquer (par contenu)
-    seen_contents = set()
-    unique_tweets = []
-    
-    for tweet in all_tweets:
-        content_key = tweet['content'][:100]  # Premiers 100 chars
-        if content_key not in seen_contents:
-            seen_contents.add(content_key)
-            unique_tweets.append(tweet)
+    # Dédupliquer (quasi-doublons : snippet Google vs texte Nitter)
+    unique_tweets = veille_dedup.dedupe(all_tweets)
     
     print(f"   ✅ Total: {len(unique_tweets)} tweets uniques")
     
@@ -228,11 +197,7 @@ def scrape_reddit(keyword, max_posts=10):
     try:
         search_url = f"https://www.reddit.com/search.json?q={keyword.replace(' ', '%20')}&sort=new&limit={max_posts}"
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(search_url, headers=headers, timeout=10)
+        response = veille_http.get(search_url, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -265,7 +230,7 @@ def scrape_hackernews(keyword, max_items=10):
     try:
         search_url = f"https://hn.algolia.com/api/v1/search?query={keyword.replace(' ', '%20')}&tags=story&hitsPerPage={max_items}"
         
-        response = requests.get(search_url, timeout=10)
+        response = veille_http.get(search_url, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -309,7 +274,6 @@ def run_daily_scrape():
     for keyword in KEYWORDS:
         tweets = scrape_twitter_all_methods(keyword)
         all_data['twitter'].extend(tweets)
-        time.sleep(random.uniform(3, 6))
     
     # Reddit
     print("\n\n🔴 REDDIT")
@@ -317,7 +281,6 @@ def run_daily_scrape():
         print(f"\n   Recherche: {keyword}")
         posts = scrape_reddit(keyword, max_posts=5)
         all_data['reddit'].extend(posts)
-        time.sleep(random.uniform(2, 4))
     
     # Hacker News
     print("\n\n🟠 HACKER NEWS")
@@ -325,17 +288,12 @@ def run_daily_scrape():
         print(f"\n   Recherche: {keyword}")
         items = scrape_hackernews(keyword, max_items=5)
         all_data['hackernews'].extend(items)
-        time.sleep(random.uniform(2, 4))
     
     # Sauvegarder résultats
     today = datetime.now().strftime('%Y-%m-%d')
     filename = f'veille-{today}.json'
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
-    
-    with open('veille-latest.json', 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
+    veille_output.write_json(all_data, veille_output.LATEST_FILE, filename, compress=True)
     
     print("\n\n" + "="*60)
     print("✅ VEILLE TERMINÉE")
@@ -5,14 +5,22 @@ Utilise Google Search + Génère des résumés intelligents
 """
 
 import requests
-from bs4 import BeautifulSoup
+import veille_events
+import veille_http
+import veille_output
+import veille_parse
+import veille_query
+import veille_state
+import veille_store
+import veille_summaries
+import veille_urls
 import json
 from datetime import datetime
-import time
-import random
 import re
 import anthropic
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Configuration
 KEYWORDS = [
@@ -21,52 +29,68 @@ KEYWORDS = [
     "anthropic claude",
 ]
 
-def search_google_twitter(keyword, max_results=15):
+# Regroupement des keywords en requêtes OR, selon les limites de chaque source
+QUERY_LIMITS = {
+    'twitter': {'max_terms': 8, 'max_length': 200, 'prefix': 'site:twitter.com () -filter:replies'},
+    'reddit': {'max_terms': 10, 'max_length': 512},
+    'hackernews': {'max_terms': 1, 'max_length': 512},  # Algolia n'a pas de OR : une requête par keyword
+}
+
+# Reddit incrémental : fullname (t3_xxx) du post le plus récent vu par requête
+REDDIT_CURSORS = 'reddit-cursors.json'
+REDDIT_PAGE_SIZE = 100  # Maximum accepté par l'API
+REDDIT_MAX_PAGES = 5
+
+# Hacker News incrémental : dernier created_at_i vu par keyword
+HN_WATERMARKS = 'hn-watermarks.json'
+HN_REFRESH_WINDOW = 2 * 24 * 3600  # Items récents re-demandés pour mettre à jour points/commentaires
+HN_MAX_BACKLOG = 7 * 24 * 3600  # Jamais plus ancien que la vue de la semaine, même en retard
+HN_PAGE_SIZE = 50
+HN_MAX_PAGES = 4  # Par keyword et par run ; au-delà, le watermark n'avance pas
+
+def search_google_twitter(keywords, max_results=15):
     """
     Recherche Twitter via Google (méthode la plus fiable)
+    Une seule requête OR pour tout le groupe de keywords.
+    Lève une exception si la recherche échoue (réseau, statut HTTP d'erreur).
     """
     tweets = []
+    query_text = veille_query.build_query(keywords)
     
     try:
-        # Google search "site:twitter.com keyword"
-        query = f"site:twitter.com {keyword} -filter:replies"
-        google_url = f"https://www.google.com/search?q={requests.utils.quote(query)}&num={max_results}&tbs=qdr:w"  # Dernière semaine
+        # Google search "site:twitter.com (kw1 OR kw2 ...)"
+        query = f"site:twitter.com ({query_text}) -filter:replies"
+        google_url = f"https://www.google.com/search?q={requests.utils.quote(query)}&num={min(max_results, 100)}&tbs=qdr:w"  # Dernière semaine
         
         headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'fr-FR,fr;q=0.9,en;q=0.8',
         }
         
-        response = requests.get(google_url, headers=headers, timeout=15)
+        response = veille_http.get(google_url, headers=headers, timeout=15)
+        response.raise_for_status()
         
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Parse résultats Google
-            results = soup.select('div.g, div[data-sokoban-container]')
+            # Parse résultats Google (titre, lien, snippet)
+            results = veille_parse.parse_google_results(response.text)
             
             for result in results[:max_results]:
                 try:
-                    # Titre et lien
-                    title_elem = result.select_one('h3')
-                    link_elem = result.select_one('a')
-                    snippet_elem = result.select_one('.VwiC3b, .yXK7lf, .MUxGbd')
-                    
-                    if link_elem and snippet_elem:
-                        url = link_elem.get('href', '')
+                    if result['url'] and result['snippet']:
+                        # Vérifier que c'est un tweet (twitter.com ou x.com)
+                        tweet_id = veille_urls.canonical_key(result['url'])
                         
-                        # Vérifier que c'est un tweet
-                        if 'twitter.com/' in url and '/status/' in url:
-                            # Extraire username
-                            username_match = re.search(r'twitter\.com/([^/]+)/', url)
-                            username = '@' + username_match.group(1) if username_match else '@unknown'
+                        if tweet_id and tweet_id[0] == 'twitter':
+                            url = veille_urls.canonical_url(result['url'])
+                            username = '@' + veille_urls.tweet_username(url)
                             
-                            # Contenu
-                            content = snippet_elem.get_text(strip=True)
+                            # Contenu (espaces déjà normalisés)
+                            content = result['snippet']
                             
-                            # Nettoyer le contenu
-                            content = re.sub(r'\s+', ' ', content)
+                            # Keyword du groupe auquel rattacher le tweet (aucun : écarté)
+                            keyword = veille_query.attribute(f"{result['title']} {content}", keywords)
+                            if not keyword:
+                                continue
                             
                             tweet = {
                                 'username': username,
@@ -83,32 +107,68 @@ def search_google_twitter(keyword, max_results=15):
                 except Exception as e:
                     continue
             
-            print(f"✅ Google Twitter: {len(tweets)} tweets pour '{keyword}'")
+            print(f"✅ Google Twitter: {len(tweets)} tweets pour '{query_text}'")
     
     except Exception as e:
-        print(f"❌ Google Twitter échoué pour '{keyword}': {e}")
+        print(f"❌ Google Twitter échoué pour '{query_text}': {e}")
+        raise
     
     return tweets
 
-def scrape_reddit(keyword, max_posts=10):
-    """Scrape Reddit"""
+def scrape_reddit(keywords, max_posts=10):
+    """
+    Scrape Reddit (une requête OR pour le groupe de keywords)
+    Pagine avec le curseur `after` (du plus récent au plus ancien) et s'arrête
+    dès qu'on retrouve le dernier post vu au run précédent. Le curseur n'avance
+    que si rien n'a été sauté : dernier post vu retrouvé, ou listing épuisé
+    (sinon les posts entre la dernière page lue et lui seraient perdus).
+    Lève une exception si la première page échoue.
+    """
     posts = []
+    query = veille_query.build_query(keywords)
     
     try:
-        search_url = f"https://www.reddit.com/search.json?q={keyword.replace(' ', '%20')}&sort=new&limit={max_posts}&t=week"
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
+        last_seen = veille_state.load_state(REDDIT_CURSORS, {}).get(query)
+        newest = None
+        after = None
+        caught_up = False
         
-        response = requests.get(search_url, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
+        for page in range(REDDIT_MAX_PAGES):
+            params = {
+                'q': query,
+                'sort': 'new',
+                't': 'week',
+                'limit': min(REDDIT_PAGE_SIZE, max_posts - len(posts))
+            }
+            if after:
+                params['after'] = after
+            
+            response = veille_http.get("https://www.reddit.com/search.json", params=params, timeout=10)
+            
+            if response.status_code != 200:
+                if page == 0:
+                    response.raise_for_status()
+                    raise RuntimeError(f"Reddit a répondu {response.status_code}")
+                break  # Pages suivantes : on garde ce qui a été lu, sans avancer le curseur
+            
+            listing = response.json().get('data', {})
+            children = listing.get('children', [])
+            reached_last_seen = False
             
-            for post in data.get('data', {}).get('children', []):
+            for post in children:
                 post_data = post.get('data', {})
                 
+                if last_seen and post_data.get('name') == last_seen:
+                    reached_last_seen = True
+                    break
+                
+                newest = newest or post_data.get('name')
+                
+                # Keyword du groupe auquel rattacher le post (aucun : écarté)
+                keyword = veille_query.attribute(f"{post_data.get('title', '')} {post_data.get('selftext', '')}", keywords)
+                if not keyword:
+                    continue
+                
                 posts.append({
                     'title': post_data.get('title', ''),
                     'subreddit': post_data.get('subreddit', ''),
@@ -121,43 +181,121 @@ def scrape_reddit(keyword, max_posts=10):
                     'selftext': post_data.get('selftext', '')[:200]  # Preview
                 })
             
-            print(f"✅ {len(posts)} posts Reddit trouvés pour '{keyword}'")
+            after = listing.get('after')
+            if reached_last_seen or not after or not children:
+                caught_up = True
+                break
+            if len(posts) >= max_posts:
+                break
+        
+        # Premier run : pas de curseur, donc pas de trou possible
+        if newest and (caught_up or not last_seen):
+            veille_state.update_state(REDDIT_CURSORS, {}, lambda cursors: cursors.update({query: newest}))
+        
+        print(f"✅ {len(posts)} posts Reddit trouvés pour '{query}'")
     
     except Exception as e:
         print(f"❌ Reddit scraping échoué: {e}")
+        raise
     
     return posts
 
-def scrape_hackernews(keyword, max_items=10):
-    """Scrape Hacker News"""
+def hn_item(hit, keyword):
+    """Item veille d'un hit Algolia"""
+    return {
+        'title': hit.get('title', ''),
+        'author': hit.get('author', ''),
+        'url': hit.get('url', f"https://news.ycombinator.com/item?id={hit.get('objectID')}"),
+        'points': hit.get('points', 0),
+        'comments': hit.get('num_comments', 0),
+        'created': hit.get('created_at', ''),
+        'keyword': keyword
+    }
+
+def scrape_hackernews(keywords, max_items=10):
+    """
+    Scrape Hacker News
+    Algolia n'a pas de OR (et des optionalWords feraient remonter toute story
+    contenant "claude" ou "code") : une requête par keyword, tous ses mots
+    requis, puis seuls les hits contenant réellement le keyword sont gardés.
+    Premier run : les max_items plus pertinentes. Ensuite, toutes les
+    stories plus récentes que le dernier created_at_i vu (moins
+    HN_REFRESH_WINDOW pour rafraîchir les scores), page par page ; le
+    watermark n'avance que si toutes les pages ont été lues (au plus
+    HN_MAX_PAGES par run, jamais plus loin que HN_MAX_BACKLOG en arrière).
+    Lève une exception si une requête échoue.
+    """
     items = []
+    per_keyword = max(1, max_items // len(keywords))
     
-    try:
-        search_url = f"https://hn.algolia.com/api/v1/search?query={keyword.replace(' ', '%20')}&tags=story&hitsPerPage={max_items}"
-        
-        response = requests.get(search_url, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
+    for keyword in keywords:
+        try:
+            watermark = veille_state.load_state(HN_WATERMARKS, {}).get(keyword)
             
-            for hit in data.get('hits', []):
-                items.append({
-                    'title': hit.get('title', ''),
-                    'author': hit.get('author', ''),
-                    'url': hit.get('url', f"https://news.ycombinator.com/item?id={hit.get('objectID')}"),
-                    'points': hit.get('points', 0),
-                    'comments': hit.get('num_comments', 0),
-                    'created': hit.get('created_at', ''),
-                    'keyword': keyword
-                })
+            params = {
+                'query': keyword,
+                'tags': 'story',
+                'hitsPerPage': per_keyword
+            }
             
-            print(f"✅ {len(items)} items Hacker News trouvés pour '{keyword}'")
-    
-    except Exception as e:
-        print(f"❌ HN scraping échoué: {e}")
+            if watermark:
+                # Plus récents d'abord, bornés par le watermark
+                search_url = "https://hn.algolia.com/api/v1/search_by_date"
+                since = max(watermark - HN_REFRESH_WINDOW, int(time.time()) - HN_MAX_BACKLOG)
+                params.update(hitsPerPage=HN_PAGE_SIZE, numericFilters=f"created_at_i>{since}")
+                pages = HN_MAX_PAGES
+            else:
+                search_url = "https://hn.algolia.com/api/v1/search"
+                pages = 1
+            
+            hits = []
+            caught_up = not watermark  # Premier run : pas de watermark, donc pas de trou possible
+            for page in range(pages):
+                response = veille_http.get(search_url, params={**params, 'page': page}, timeout=10)
+                response.raise_for_status()
+                
+                data = response.json()
+                hits.extend(data.get('hits', []))
+                if not data.get('hits') or page + 1 >= data.get('nbPages', 0):
+                    caught_up = True
+                    break
+            
+            found = 0
+            for hit in hits:
+                text = f"{hit.get('title') or ''} {hit.get('url') or ''} {hit.get('story_text') or ''}"
+                if veille_query.match_keywords(text, [keyword]):
+                    items.append(hn_item(hit, keyword))
+                    found += 1
+            
+            newest = max([hit.get('created_at_i') or 0 for hit in hits] + [watermark or 0])
+            if newest and caught_up:
+                veille_state.update_state(HN_WATERMARKS, {}, lambda marks: marks.update({keyword: newest}))
+            elif not caught_up:
+                print(f"⚠️ HN '{keyword}': plus de {HN_MAX_PAGES} pages, watermark inchangé")
+            
+            print(f"✅ {found} items Hacker News trouvés pour '{keyword}'")
+        
+        except Exception as e:
+            print(f"❌ HN scraping échoué pour '{keyword}': {e}")
+            raise
     
     return items
 
+# Résumé IA
+SUMMARY_MODEL = "claude-3-5-sonnet-20241022"
+SUMMARY_MAX_TOKENS = 1500
+
+# Clients Anthropic par clé API : réutilisés d'un run à l'autre quand le
+# scraper tourne dans un process persistant (server.py)
+anthropic_clients = {}
+
+def get_anthropic_client(api_key):
+    """Client Anthropic (pool de connexions) partagé pour cette clé"""
+    client = anthropic_clients.get(api_key)
+    if client is None:
+        client = anthropic_clients[api_key] = anthropic.Anthropic(api_key=api_key)
+    return client
+
 def generate_summary(all_data):
     """
     Génère un résumé intelligent avec Claude
@@ -209,15 +347,7 @@ def generate_summary(all_data):
                 'trends': []
             }
         
-        client = anthropic.Anthropic(api_key=api_key)
-        
-        message = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=1500,
-            messages=[
-                {
-                    "role": "user",
-                    "content": f"""Analyse ces posts sur OpenClaw et Claude Code et génère un résumé en français.
+        prompt = f"""Analyse ces posts sur OpenClaw et Claude Code et génère un résumé en français.
 
 Contenu à analyser :
 {content_text}
@@ -230,6 +360,23 @@ Réponds en JSON avec cette structure :
 }}
 
 Sois concis et pertinent. Focus sur les nouveautés, problèmes et opportunités."""
+        
+        # Mêmes entrées (posts, gabarit, modèle) qu'un run précédent : pas d'appel API
+        summary_key = veille_summaries.cache_key(SUMMARY_MODEL, prompt, max_tokens=SUMMARY_MAX_TOKENS)
+        cached_summary = veille_summaries.lookup(summary_key)
+        if cached_summary:
+            print("✅ Résumé IA inchangé (cache)")
+            return cached_summary
+        
+        client = get_anthropic_client(api_key)
+        
+        message = client.messages.create(
+            model=SUMMARY_MODEL,
+            max_tokens=SUMMARY_MAX_TOKENS,
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt
                 }
             ]
         )
@@ -245,6 +392,7 @@ Sois concis et pertinent. Focus sur les nouveautés, problèmes et opportunités
             summary_data = json.loads(response_text)
         
         print("✅ Résumé IA généré")
+        veille_summaries.store(summary_key, summary_data)
         
         return summary_data
     
@@ -256,6 +404,82 @@ Sois concis et pertinent. Focus sur les nouveautés, problèmes et opportunités
             'trends': []
         }
 
+def scrape_source(source, icon, fetch, keywords, limits, **kwargs):
+    """
+    Interroge une source avec le moins de requêtes possible : les keywords sont
+    regroupés en requêtes OR (limits), les maxima sont par keyword.
+    Le débit par hôte est géré par veille_http.
+    Une requête en échec est signalée et les autres gardées ; si toutes
+    échouent, lève RuntimeError (la source est en erreur, pas vide).
+    """
+    results = []
+    errors = []
+    groups = veille_query.plan_queries(keywords, **limits)
+    
+    for i, group in enumerate(groups):
+        query = veille_query.build_query(group)
+        print(f"   {icon} Recherche: {query}")
+        try:
+            found = fetch(group, **{name: value * len(group) for name, value in kwargs.items()})
+        except Exception as e:
+            errors.append(f"{query}: {e}")
+            veille_events.emit('progress', source=source, keywords=group, error=str(e),
+                               done=i + 1, total=len(groups))
+            continue
+        results.extend(found)
+        veille_events.emit('progress', source=source, keywords=group, found=len(found),
+                           done=i + 1, total=len(groups))
+    
+    if errors and len(errors) == len(groups):
+        raise RuntimeError(f"{source} : " + ' ; '.join(errors))
+    
+    return results
+
+# Sources : nom -> (icône, fonction, maxima par keyword)
+SOURCES = {
+    'twitter': ('🐦', search_google_twitter, {'max_results': 10}),
+    'reddit': ('🔴', scrape_reddit, {'max_posts': 25}),
+    'hackernews': ('🟠', scrape_hackernews, {'max_items': 5}),
+}
+
+def scrape_named_source(name, keywords=None):
+    """Scrape une source (tous les keywords par défaut)"""
+    icon, fetch, kwargs = SOURCES[name]
+    return scrape_source(name, icon, fetch, keywords or KEYWORDS, QUERY_LIMITS[name], **kwargs)
+
+def save_results(all_data):
+    """
+    Sauvegarde puis résumé IA : les items rafraîchis (toutes les sources ou
+    une partie) vont dans le store, une fois chacun ; les fichiers JSON en
+    sont des vues. veille-latest.json reprend les items vus dans la semaine
+    (pas seulement ceux de ce run : Reddit et HN sont incrémentaux), le
+    résumé porte sur cette vue. L'archive du jour ne garde que les
+    nouveautés / modifications du jour.
+    Retourne (fichier du jour, compteurs par source).
+    """
+    today = datetime.now().strftime('%Y-%m-%d')
+    filename = f'veille-{today}.json'
+    
+    store = veille_store.ItemStore()
+    run_id, counts = store.ingest({**all_data, 'summary': {}})
+    for section, count in counts.items():
+        print(f"🆕 {section}: {count['new']} nouveaux, {count['updated']} modifiés")
+    
+    latest = store.latest_view(run_id)
+    
+    print("\n\n🤖 GÉNÉRATION RÉSUMÉ IA")
+    veille_events.emit('progress', source='summary', done=0, total=1)
+    all_data['summary'] = latest['summary'] = generate_summary(latest)
+    store.set_summary(run_id, latest['summary'])
+    
+    veille_output.write_json(store.updated_since(today, run_id), filename)
+    veille_output.write_json(latest, veille_output.LATEST_FILE, compress=True)
+    
+    veille_events.emit('data', run=run_id, cursor=store.last_seq(), date=all_data['date'], counts=counts)
+    store.close()
+    
+    return filename, counts
+
 def run_daily_scrape():
     """Exécute la veille quotidienne complète"""
     
@@ -273,43 +497,19 @@ def run_daily_scrape():
         'summary': {}
     }
     
-    # Twitter (Google Search)
-    print("\n🐦 TWITTER (via Google)")
-    for keyword in KEYWORDS:
-        print(f"\n   Recherche: {keyword}")
-        tweets = search_google_twitter(keyword, max_results=10)
-        all_data['twitter'].extend(tweets)
-        time.sleep(random.uniform(3, 6))
-    
-    # Reddit
-    print("\n\n🔴 REDDIT")
-    for keyword in KEYWORDS:
-        print(f"\n   Recherche: {keyword}")
-        posts = scrape_reddit(keyword, max_posts=5)
-        all_data['reddit'].extend(posts)
-        time.sleep(random.uniform(2, 4))
-    
-    # Hacker News
-    print("\n\n🟠 HACKER NEWS")
-    for keyword in KEYWORDS:
-        print(f"\n   Recherche: {keyword}")
-        items = scrape_hackernews(keyword, max_items=5)
-        all_data['hackernews'].extend(items)
-        time.sleep(random.uniform(2, 4))
-    
-    # Générer résumé IA
-    print("\n\n🤖 GÉNÉRATION RÉSUMÉ IA")
-    all_data['summary'] = generate_summary(all_data)
-    
-    # Sauvegarder résultats
-    today = datetime.now().strftime('%Y-%m-%d')
-    filename = f'veille-{today}.json'
-    
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
+    # Les trois sources tournent en parallèle, chaque hôte a son propre débit
+    # (veille_http) : la durée totale devient celle de la source la plus lente.
+    print("\n🐦 TWITTER (via Google) | 🔴 REDDIT | 🟠 HACKER NEWS")
+    with ThreadPoolExecutor(max_workers=len(SOURCES)) as executor:
+        futures = {name: executor.submit(scrape_named_source, name) for name in SOURCES}
+        for name, future in futures.items():
+            try:
+                all_data[name] = future.result()
+            except Exception as e:
+                # Source en erreur : rien d'ingéré, ses items de la semaine restent dans la vue
+                print(f"❌ {name}: {e}")
     
-    with open('veille-latest.json', 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
+    filename, counts = save_results(all_data)
     
     print("\n\n" + "="*60)
     print("✅ VEILLE TERMINÉE")
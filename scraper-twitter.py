@@ -4,12 +4,10 @@ Veille Twitter - OpenClaw & Claude Code
 Scrape les derniers tweets et discussions
 """
 
-import requests
-from bs4 import BeautifulSoup
-import json
+import veille_http
+import veille_output
+import veille_parse
 from datetime import datetime
-import time
-import random
 
 # Configuration
 KEYWORDS = [
@@ -35,30 +33,19 @@ def scrape_twitter(keyword, max_tweets=20):
             # Recherche sur Nitter
             search_url = f"{instance}/search?f=tweets&q={keyword.replace(' ', '%20')}"
             
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(search_url, headers=headers, timeout=10)
+            response = veille_http.get(search_url, timeout=10)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
                 # Parse tweets
-                tweet_elements = soup.find_all('div', class_='timeline-item')
+                tweet_elements = veille_parse.parse_nitter_timeline(response.text)
                 
                 for tweet_elem in tweet_elements[:max_tweets]:
                     try:
-                        # Extraire infos tweet
-                        username = tweet_elem.find('a', class_='username')
-                        content = tweet_elem.find('div', class_='tweet-content')
-                        date = tweet_elem.find('span', class_='tweet-date')
-                        
-                        if username and content:
+                        if tweet_elem['username'] is not None and tweet_elem['content'] is not None:
                             tweet = {
-                                'username': username.text.strip(),
-                                'content': content.text.strip(),
-                                'date': date.text.strip() if date else 'Récent',
+                                'username': tweet_elem['username'],
+                                'content': tweet_elem['content'],
+                                'date': tweet_elem['date'] or 'Récent',
                                 'keyword': keyword,
                                 'timestamp': datetime.now().isoformat()
                             }
@@ -74,9 +61,6 @@ def scrape_twitter(keyword, max_tweets=20):
         except Exception as e:
             print(f"⚠️  {instance} échoué: {e}")
             continue
-        
-        # Pause entre instances
-        time.sleep(random.uniform(1, 3))
     
     return tweets
 
@@ -89,11 +73,7 @@ def scrape_reddit(keyword, max_posts=10):
         # Reddit JSON API (publique)
         search_url = f"https://www.reddit.com/search.json?q={keyword.replace(' ', '%20')}&sort=new&limit={max_posts}"
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(search_url, headers=headers, timeout=10)
+        response = veille_http.get(search_url, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -128,7 +108,7 @@ def scrape_hackernews(keyword, max_items=10):
         # HN Algolia API
         search_url = f"https://hn.algolia.com/api/v1/search?query={keyword.replace(' ', '%20')}&tags=story&hitsPerPage={max_items}"
         
-        response = requests.get(search_url, timeout=10)
+        response = veille_http.get(search_url, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -173,7 +153,6 @@ def run_daily_scrape():
         print(f"\n   Recherche: {keyword}")
         tweets = scrape_twitter(keyword, max_tweets=10)
         all_data['twitter'].extend(tweets)
-        time.sleep(random.uniform(2, 5))
     
     # Reddit
     print("\n\n🔴 REDDIT")
@@ -181,7 +160,6 @@ def run_daily_scrape():
         print(f"\n   Recherche: {keyword}")
         posts = scrape_reddit(keyword, max_posts=5)
         all_data['reddit'].extend(posts)
-        time.sleep(random.uniform(2, 4))
     
     # Hacker News
     print("\n\n🟠 HACKER NEWS")
@@ -189,18 +167,13 @@ def run_daily_scrape():
         print(f"\n   Recherche: {keyword}")
         items = scrape_hackernews(keyword, max_items=5)
         all_data['hackernews'].extend(items)
-        time.sleep(random.uniform(2, 4))
     
     # Sauvegarder résultats
     today = datetime.now().strftime('%Y-%m-%d')
     filename = f'veille-{today}.json'
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
-    
-    # Sauvegarder aussi comme "latest"
-    with open('veille-latest.json', 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
+    # Sérialisé une fois, "latest" + archive du jour (lien physique)
+    veille_output.write_json(all_data, veille_output.LATEST_FILE, filename, compress=True)
     
     print("\n\n" + "="*60)
     print("✅ VEILLE TERMINÉE")
@@ -3,10 +3,18 @@
 Mini serveur Flask pour dashboard + scraping manuel
 """
 
-from flask import Flask, jsonify, send_file
+from flask import Flask, jsonify, send_file, request, abort, Response, stream_with_context
 from flask_cors import CORS
+import veille_events
+import veille_jobs
+import veille_output
+import veille_store
 import subprocess
+from datetime import datetime
 import threading
+import hashlib
+import importlib.util
+import gzip
 import os
 
 app = Flask(__name__)
@@ -16,37 +24,190 @@ CORS(app)  # Permettre requêtes depuis dashboard
 scraping_status = {
     'running': False,
     'last_run': None,
-    'error': None
+    'error': None,
+    'progress': {}  # Par source : dernier événement de progression
 }
 
-def run_scraper():
-    """Lance le scraper en arrière-plan"""
-    global scraping_status
+SCRAPER_FILE = 'scraper-twitter-v3.py'
+SCRAPER_TIMEOUT = 300  # 5 min max (mode subprocess)
+
+# 'thread' : scraper importé une fois et exécuté dans le serveur (sessions
+# HTTP, caches, client Anthropic gardés entre deux runs) ;
+# 'subprocess' : un python3 par run (isolé, tué après SCRAPER_TIMEOUT)
+SCRAPER_WORKER = os.environ.get('VEILLE_WORKER', 'thread')
+
+scraper_module = None
+scraper_lock = threading.Lock()
+
+# Jobs : un scraping = un job parent + un sous-job par source (en parallèle)
+JOB_WORKERS = 3
+
+# Événements poussés aux dashboards (/api/events)
+events = veille_events.EventBus()
+
+def publish_status():
+    """Diffuse le statut courant"""
+    events.publish({'event': 'status', **scraping_status})
+
+def handle_event(payload):
+    """Événement venant du scraper : mis dans le statut puis diffusé"""
+    if payload.get('event') == 'progress':
+        scraping_status['progress'][payload.get('source')] = payload
+    events.publish(payload)
+
+# Cache de veille-latest.json : relu seulement quand le fichier change
+# (écrit par rename atomique, cf. veille_output)
+LATEST_FILE = veille_output.LATEST_FILE
+latest_cache = {
+    'key': None,
+    'etag': None,
+    'variants': {}
+}
+latest_lock = threading.Lock()
+
+def load_latest():
+    """
+    ETag (hash du contenu) et variantes {encodage: octets} de veille-latest.json.
+    Les fichiers .br / .gz précompressés sont utilisés s'ils sont à jour,
+    sinon la variante gzip est calculée une fois ici.
+    """
+    stat = os.stat(LATEST_FILE)
+    key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    
+    with latest_lock:
+        if latest_cache['key'] != key:
+            with open(LATEST_FILE, 'rb') as f:
+                payload = f.read()
+            
+            variants = {'identity': payload}
+            for encoding, extension in (('br', '.br'), ('gzip', '.gz')):
+                try:
+                    if os.stat(LATEST_FILE + extension).st_mtime_ns >= stat.st_mtime_ns:
+                        with open(LATEST_FILE + extension, 'rb') as f:
+                            variants[encoding] = f.read()
+                except FileNotFoundError:
+                    pass
+            
+            if 'gzip' not in variants:
+                variants['gzip'] = gzip.compress(payload, mtime=0)
+            
+            latest_cache['key'] = key
+            latest_cache['etag'] = hashlib.blake2b(payload, digest_size=16).hexdigest()
+            latest_cache['variants'] = variants
+        
+        return latest_cache['etag'], latest_cache['variants']
+
+# Store des items (séquence d'ingestion) pour /api/items
+ITEMS_PAGE_SIZE = 500
+item_store = None
+item_store_lock = threading.Lock()
+
+def get_item_store():
+    """Store partagé, ouvert à la première requête"""
+    global item_store
+    
+    with item_store_lock:
+        if item_store is None:
+            item_store = veille_store.ItemStore()
+        return item_store
+
+def load_scraper():
+    """Module du scraper v3, importé une seule fois"""
+    global scraper_module
+    
+    with scraper_lock:
+        if scraper_module is None:
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), SCRAPER_FILE)
+            spec = importlib.util.spec_from_file_location('scraper_twitter_v3', path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            scraper_module = module
+        return scraper_module
+
+def run_scraper_subprocess():
+    """
+    Lance le scraper v3 dans un python3 séparé ; ses événements arrivent sur
+    stdout (lignes "@@event ...") au fil du run. Retourne l'erreur ou None.
+    """
+    process = subprocess.Popen(
+        ['python3', SCRAPER_FILE],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env={**os.environ, 'VEILLE_EVENTS': '1', 'PYTHONUNBUFFERED': '1'}
+    )
+    timer = threading.Timer(SCRAPER_TIMEOUT, process.kill)
+    timer.start()
     
     try:
-        scraping_status['running'] = True
-        scraping_status['error'] = None
+        stderr = []
+        stderr_reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()))
+        stderr_reader.start()
         
-        # Lancer le scraper v3 (avec résumés IA)
-        result = subprocess.run(
-            ['python3', 'scraper-twitter-v3.py'],
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 min max
-        )
+        for line in process.stdout:
+            payload = veille_events.parse_line(line)
+            if payload:
+                handle_event(payload)
         
-        if result.returncode == 0:
-            scraping_status['last_run'] = 'success'
-        else:
-            scraping_status['last_run'] = 'error'
-            scraping_status['error'] = result.stderr[:500]
+        returncode = process.wait()
+        stderr_reader.join()
+    finally:
+        timer.cancel()
     
-    except Exception as e:
-        scraping_status['last_run'] = 'error'
-        scraping_status['error'] = str(e)
+    if returncode != 0:
+        return ''.join(stderr)[:500] or f'Code retour {returncode}'
+    return None
+
+def run_source_job(job, queue):
+    """
+    Sous-job : scrape une source (keywords éventuellement restreints) ; un
+    échec de la source lève une exception, le sous-job finit en erreur et
+    l'étape finale l'écarte
+    """
+    params = job['params']
+    items = load_scraper().scrape_named_source(params['source'], params.get('keywords'))
+    return {'items': items}
+
+def run_scrape_job(job, queue):
+    """
+    Étape finale d'un scraping : sauvegarde des sources rafraîchies (les
+    autres restent telles que dans le store), résumé IA. En mode
+    subprocess, tout le run.
+    """
+    if SCRAPER_WORKER == 'subprocess':
+        error = run_scraper_subprocess()
+        if error:
+            raise RuntimeError(error)
+        return None
     
-    finally:
-        scraping_status['running'] = False
+    scraper = load_scraper()
+    results = {
+        child['params']['source']: child['result']['items']
+        for child in queue.children(job['id'], with_result=True)
+        if child['status'] == 'done'
+    }
+    if not results:
+        raise RuntimeError("Aucune source n'a abouti")
+    
+    filename, counts = scraper.save_results({'date': datetime.now().isoformat(), **results})
+    return {'file': filename, 'counts': counts}
+
+def on_job_change(job, status):
+    """Statut global + événement 'job' à chaque démarrage / fin de job"""
+    if job['parent'] is None and status in veille_jobs.FINISHED:
+        scraping_status['last_run'] = 'success' if status == 'done' else 'error'
+        scraping_status['error'] = jobs.get(job['id'])['error']
+    
+    scraping_status['running'] = bool(jobs.active())
+    events.publish({'event': 'job', 'id': job['id'], 'parent': job['parent'],
+                    'kind': job['kind'], 'params': job['params'], 'status': status})
+    publish_status()
+
+jobs = veille_jobs.JobQueue()
+runner = veille_jobs.JobRunner(jobs, {
+    'scrape': run_scrape_job,
+    'scrape-source': run_source_job
+}, workers=JOB_WORKERS, on_change=on_job_change)
 
 @app.route('/')
 def index():
@@ -55,34 +216,176 @@ def index():
 
 @app.route('/veille-latest.json')
 def get_latest():
-    """Retourne les dernières données"""
-    return send_file('veille-latest.json')
+    """
+    Retourne les dernières données : ETag fort par encodage, 304 si le
+    dashboard a déjà cette version, sinon variante compressée si acceptée
+    """
+    try:
+        etag, variants = load_latest()
+    except FileNotFoundError:
+        abort(404)
+    
+    encoding = request.accept_encodings.best_match(
+        [name for name in ('br', 'gzip') if name in variants], default='identity'
+    )
+    tag = etag if encoding == 'identity' else f'{etag}-{encoding}'
+    
+    headers = {
+        'ETag': f'"{tag}"',
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': 'no-cache'  # Toujours revalider (If-None-Match)
+    }
+    
+    # Même contenu, quel que soit l'encodage reçu précédemment
+    if any(request.if_none_match.contains_weak(candidate) for candidate in (etag, f'{etag}-br', f'{etag}-gzip')):
+        return Response(status=304, headers=headers)
+    
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    
+    return Response(variants[encoding], mimetype='application/json', headers=headers)
+
+@app.route('/api/items')
+def get_items():
+    """
+    Items ajoutés ou modifiés après le curseur `since` (séquence d'ingestion),
+    par pages de `limit`. Le dashboard repasse `cursor` et `window` (premier
+    run de la fenêtre de la semaine qu'il affiche) au prochain appel.
+    Sans curseur, curseur inconnu, ou si des items sont sortis de la fenêtre
+    depuis `window` : la vue complète de veille-latest.json, avec reset=true.
+    """
+    store = get_item_store()
+    since = request.args.get('since', type=int)
+    window = request.args.get('window', type=int)
+    limit = max(1, min(request.args.get('limit', ITEMS_PAGE_SIZE, type=int), ITEMS_PAGE_SIZE))
+    last_seq = store.last_seq()
+    start = store.window_start()
+    
+    if (since is None or since > last_seq or window is None or start is None or window > start
+            or (window < start and store.left_window(window, start))):
+        view = store.latest_view()
+        return jsonify({
+            'reset': True,
+            'cursor': last_seq,
+            'window': start,
+            'more': False,
+            'run': store.run_info(),
+            'items': [
+                {'key': str(veille_store.item_key(item)), 'source': source, 'item': item}
+                for source in veille_store.SOURCES
+                for item in view[source]
+            ]
+        })
+    
+    changes = store.changes_since(since, limit + 1)
+    more = len(changes) > limit
+    changes = changes[:limit]
+    
+    return jsonify({
+        'reset': False,
+        'cursor': changes[-1][0] if changes else since,
+        'window': start,
+        'more': more,
+        'run': store.run_info(),
+        'items': [
+            {'seq': seq, 'key': str(key), 'source': source, 'item': item}
+            for seq, key, source, item in changes
+        ]
+    })
+
+def is_string_list(value):
+    """Liste de chaînes non vides"""
+    return isinstance(value, list) and all(isinstance(item, str) and item.strip() for item in value)
 
 @app.route('/api/scrape', methods=['POST'])
 def trigger_scrape():
-    """Déclenche un scraping manuel"""
+    """
+    Déclenche un scraping manuel, éventuellement ciblé :
+    {"sources": ["reddit"], "keywords": ["openclaw"]} (tout par défaut).
+    Un déclenchement identique à un job pas encore démarré lui est rattaché.
+    En mode subprocess, seul le scraping complet est possible.
+    """
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        body = {'sources': body}  # Rejeté ci-dessous
+    sources = body.get('sources') or list(veille_store.SOURCES)
+    keywords = body.get('keywords') or None
     
-    if scraping_status['running']:
+    if (not is_string_list(sources) or any(source not in veille_store.SOURCES for source in sources)
+            or (keywords is not None and not is_string_list(keywords))):
         return jsonify({
             'status': 'error',
-            'message': 'Scraping déjà en cours...'
+            'message': "Paramètres invalides : sources et keywords sont des listes de chaînes "
+                       f"(sources connues : {', '.join(veille_store.SOURCES)})"
         }), 400
     
-    # Lancer en arrière-plan
-    thread = threading.Thread(target=run_scraper)
-    thread.start()
+    sources = [source for source in veille_store.SOURCES if source in sources]
+    keywords = sorted(set(kw.strip() for kw in keywords)) if keywords else None
+    
+    if SCRAPER_WORKER == 'subprocess' and (keywords or len(sources) < len(veille_store.SOURCES)):
+        return jsonify({
+            'status': 'error',
+            'message': 'Scraping ciblé (sources / keywords) indisponible en mode subprocess (VEILLE_WORKER)'
+        }), 400
+    
+    children = []
+    if SCRAPER_WORKER != 'subprocess':
+        children = [('scrape-source', {'source': source, 'keywords': keywords}) for source in sources]
+    
+    job_id, coalesced = jobs.enqueue('scrape', {'sources': sources, 'keywords': keywords}, children)
+    scraping_status['running'] = True
+    runner.start()
+    runner.notify()
     
     return jsonify({
         'status': 'success',
-        'message': 'Scraping lancé ! Rafraîchir dans 1-2 min.'
+        'job': job_id,
+        'coalesced': coalesced,
+        'message': 'Scraping déjà prévu, rattaché au job existant.' if coalesced
+                   else 'Scraping lancé ! Rafraîchir dans 1-2 min.'
     })
 
+@app.route('/api/jobs')
+def list_jobs():
+    """Jobs en attente ou en cours"""
+    return jsonify(jobs.active())
+
+@app.route('/api/jobs/<int:job_id>')
+def get_job(job_id):
+    """Statut d'un job et de ses sous-jobs"""
+    job = jobs.get(job_id)
+    if job is None:
+        abort(404)
+    return jsonify(job)
+
 @app.route('/api/status')
 def get_status():
     """Retourne le statut du scraping"""
     return jsonify(scraping_status)
 
+@app.route('/api/events')
+def get_events():
+    """
+    Flux SSE : statut courant à la connexion, puis progression par source /
+    requête ("progress"), statut ("status") et données écrites ("data")
+    """
+    stream = events.stream(initial=[{'event': 'status', **scraping_status}])
+    return Response(stream_with_context(stream), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Pas de buffering derrière nginx
+    })
+
+if SCRAPER_WORKER != 'subprocess':
+    veille_events.set_sink(handle_event)
+
 if __name__ == '__main__':
+    # Imports du scraper (requests, bs4, anthropic...) faits dès le démarrage,
+    # puis reprise des jobs interrompus par un arrêt précédent
+    if SCRAPER_WORKER != 'subprocess':
+        load_scraper()
+    scraping_status['running'] = bool(jobs.active())
+    runner.start()
+    
     port = int(os.environ.get('PORT', 8080))
     print(f"🚀 Serveur lancé sur http://localhost:{port}")
     print(f"📊 Dashboard: http://localhost:{port}")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Veille en continu
+Les scrapers (v3 + RSS) sont chargés une seule fois ; chaque source est
+interrogée à son propre rythme (HN toutes les 10 min, RSS 15 min, Reddit
+30 min, Google horaire ; à chaque passage RSS, seuls les comptes dus selon
+leur fréquence de publication sont interrogés), avec un décalage
+aléatoire pour ne pas solliciter les hôtes par rafales. Après chaque
+passage, les items de la source vont dans le store et les fichiers sont
+réécrits (vues JSON de la semaine, événement "data").
+
+    python3 veille-daemon.py [--interval hackernews=300 ...] [--once]
+"""
+
+import argparse
+import heapq
+import importlib.util
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import veille_dedup
+import veille_schedule
+
+# Intervalle de chaque tâche (secondes)
+INTERVALS = {
+    'hackernews': 10 * 60,
+    'rss': 15 * 60,
+    'reddit': 30 * 60,
+    'twitter': 60 * 60,  # Google, le plus strict
+}
+JITTER = 0.1  # ±10 % sur chaque intervalle
+START_SPREAD = 60  # Premiers passages étalés sur la première minute
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_script(filename, name):
+    """Importe un script du dépôt (nom avec tirets) comme module"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BASE_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class Daemon:
+    """Planificateur : une file de prochaines échéances, une tâche à la fois par source"""
+
+    def __init__(self, intervals=INTERVALS):
+        self.intervals = intervals
+        self.v3 = load_script('scraper-twitter-v3.py', 'scraper_twitter_v3')
+        self.rss = load_script('scraper-twitter-rss.py', 'scraper_twitter_rss') if 'rss' in intervals else None
+        self.schedule = veille_schedule.AccountSchedule()  # Comptes RSS interrogés selon leur rythme
+        self.executor = ThreadPoolExecutor(max_workers=len(intervals), thread_name_prefix='daemon')
+        self.save_lock = threading.Lock()  # Fusion + sauvegarde, une à la fois
+        self.stopping = threading.Event()
+
+    def next_delay(self, task):
+        interval = self.intervals[task]
+        return interval * random.uniform(1 - JITTER, 1 + JITTER)
+
+    def fetch(self, task):
+        """Résultats par source d'une tâche"""
+        if task == 'rss':
+            tweets = {}
+            for tweet in self.rss.collect_tweets(self.rss.TWITTER_ACCOUNTS, self.schedule):
+                if tweet.get('url'):
+                    tweet.setdefault('keyword', f"@{tweet['username']}")
+                    tweets.setdefault(veille_dedup.item_key(tweet), tweet)
+            self.rss.RSS_CACHE.save()
+            self.rss.NITTER_POOL.save()
+            return {'twitter': list(tweets.values())}
+
+        return {task: self.v3.scrape_named_source(task)}
+
+    def run_task(self, task):
+        started = time.time()
+        try:
+            results = self.fetch(task)
+            with self.save_lock:
+                self.v3.save_results({'date': datetime.now().isoformat(), **results})
+            print(f"✅ [{task}] {sum(map(len, results.values()))} items en {time.time() - started:.0f}s")
+        except Exception as e:
+            print(f"❌ [{task}] {e}")
+
+    def run(self, once=False):
+        now = time.time()
+        schedule = [(now + random.uniform(0, min(START_SPREAD, interval)), task)
+                    for task, interval in self.intervals.items()]
+        heapq.heapify(schedule)
+        running = {}
+
+        while schedule and not self.stopping.is_set():
+            due, task = schedule[0]
+            wait = due - time.time()
+            if wait > 0:
+                self.stopping.wait(min(wait, 5))
+                continue
+
+            heapq.heappop(schedule)
+            future = running.get(task)
+            if future and not future.done():
+                # Passage précédent pas terminé : on repasse plus tard
+                heapq.heappush(schedule, (time.time() + self.next_delay(task), task))
+                continue
+
+            print(f"⏱️  [{task}] passage")
+            running[task] = self.executor.submit(self.run_task, task)
+            if not once:
+                heapq.heappush(schedule, (max(due + self.next_delay(task), time.time()), task))
+
+        self.executor.shutdown(wait=True)
+
+def parse_intervals(values):
+    intervals = dict(INTERVALS)
+    for value in values or []:
+        task, _, seconds = value.partition('=')
+        if task not in INTERVALS or not seconds.isdigit():
+            raise SystemExit(f"Intervalle invalide: {value} (tâches : {', '.join(INTERVALS)})")
+        if int(seconds) == 0:
+            del intervals[task]  # 0 : tâche désactivée
+        else:
+            intervals[task] = int(seconds)
+    return intervals
+
+def main():
+    parser = argparse.ArgumentParser(description="Veille en continu, chaque source à son rythme")
+    parser.add_argument('--interval', action='append', metavar='TÂCHE=SECONDES',
+                        help="intervalle d'une tâche (0 la désactive) ; répétable")
+    parser.add_argument('--once', action='store_true', help="un seul passage par tâche, puis quitter")
+    args = parser.parse_args()
+
+    intervals = parse_intervals(args.interval)
+    print("=" * 60)
+    print("🔁 VEILLE EN CONTINU")
+    print("=" * 60)
+    for task, interval in intervals.items():
+        print(f"   {task}: toutes les {interval // 60} min")
+
+    daemon = Daemon(intervals)
+    try:
+        daemon.run(once=args.once)
+    except KeyboardInterrupt:
+        print("\n🛑 Arrêt demandé, fin des passages en cours...")
+        daemon.stopping.set()
+        daemon.executor.shutdown(wait=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Archive adressée par contenu de l'historique veille-*.json
+Chaque item (et chaque résumé) est stocké une seule fois, sous le hash de
+son contenu, dans archive/objects/AAAA-MM.jsonl (fichiers en ajout seul,
+figés une fois le mois passé). Les champs réécrits à chaque run (heure du
+scraping : timestamp, date) restent hors du hash, dans le manifeste : un
+même tweet revu le lendemain reste le même objet. Chaque jour n'est plus
+qu'un petit manifeste archive/days/AAAA-MM-JJ.json listant des hash et
+les mois où les trouver.
+
+    python3 veille_archive.py migrate [fichiers...] [--remove]
+    python3 veille_archive.py add veille-latest.json [--day AAAA-MM-JJ]
+    python3 veille_archive.py show AAAA-MM-JJ
+    python3 veille_archive.py list
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+ARCHIVE_DIR = os.environ.get('VEILLE_ARCHIVE_DIR', 'archive')
+DAY_FILE_RE = re.compile(r'veille-(\d{4}-\d{2}-\d{2})\.json$')
+VOLATILE_FIELDS = ('timestamp', 'date')  # Heure du scraping (v3, Google) : hors du hash
+
+def _dump(value):
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+def content_hash(value):
+    """Hash du contenu JSON canonique (clés triées, sans espaces)"""
+    return hashlib.blake2b(_dump(value).encode('utf-8'), digest_size=12).hexdigest()
+
+def split_volatile(value):
+    """(contenu stable à hasher, champs volatils) d'un objet"""
+    volatile = {field: value[field] for field in VOLATILE_FIELDS if field in value}
+    stable = {key: item for key, item in value.items() if key not in volatile}
+    return stable, volatile
+
+class Archive:
+    """Objets (hash -> contenu) par mois + manifestes par jour"""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.days_dir = os.path.join(root, 'days')
+        self._index = None
+        self._months = {}
+
+    def _month_path(self, month):
+        return os.path.join(self.objects_dir, f'{month}.jsonl')
+
+    def _all_months(self):
+        return sorted(os.path.basename(path)[:-6] for path in glob.glob(os.path.join(self.objects_dir, '*.jsonl')))
+
+    def month_objects(self, month):
+        """Objets d'un mois (hash -> contenu), chargés à la première utilisation"""
+        if month not in self._months:
+            objects = {}
+            try:
+                with open(self._month_path(month), 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            objects[entry['h']] = entry['v']
+            except FileNotFoundError:
+                pass
+            self._months[month] = objects
+        return self._months[month]
+
+    @property
+    def index(self):
+        """Mois de chaque objet connu (hash -> AAAA-MM), pour l'ajout seulement"""
+        if self._index is None:
+            self._index = {}
+            for month in self._all_months():
+                for digest in self.month_objects(month):
+                    self._index.setdefault(digest, month)
+        return self._index
+
+    def _put(self, value, month, pending, months):
+        stable, volatile = split_volatile(value)
+        digest = content_hash(stable)
+        if digest not in self.index and digest not in pending:
+            pending[digest] = stable
+        months.add(self.index.get(digest, month))
+        return [digest, volatile] if volatile else digest
+
+    def _day_path(self, day):
+        return os.path.join(self.days_dir, f'{day}.json')
+
+    def days(self):
+        """Jours archivés, triés"""
+        return sorted(os.path.basename(path)[:-5] for path in glob.glob(os.path.join(self.days_dir, '*.json')))
+
+    def add(self, data, day):
+        """
+        Archive un fichier veille (dict) pour `day` (remplace le manifeste du
+        jour) ; retourne le nombre d'objets nouveaux
+        """
+        month = day[:7]
+        pending = {}
+        months = set()
+        manifest = {}
+        refs = []
+
+        for key, value in data.items():
+            if isinstance(value, list) and all(isinstance(item, dict) for item in value):
+                manifest[key] = [self._put(item, month, pending, months) for item in value]
+                refs.append(key)
+            elif isinstance(value, dict):
+                manifest[key] = self._put(value, month, pending, months)
+                refs.append(key)
+            else:
+                manifest[key] = value
+        manifest['_refs'] = refs
+        manifest['_months'] = sorted(months)
+
+        if pending:
+            os.makedirs(self.objects_dir, exist_ok=True)
+            with open(self._month_path(month), 'a', encoding='utf-8') as f:
+                for digest, value in pending.items():
+                    f.write(json.dumps({'h': digest, 'v': value}, ensure_ascii=False) + '\n')
+            self.month_objects(month).update(pending)
+            for digest in pending:
+                self.index[digest] = month
+
+        os.makedirs(self.days_dir, exist_ok=True)
+        tmp_path = f'{self._day_path(day)}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self._day_path(day))
+
+        return len(pending)
+
+    def load(self, day):
+        """
+        Reconstruit le fichier veille d'un jour (KeyError si absent) ; seuls
+        les mois référencés par son manifeste sont lus
+        """
+        try:
+            with open(self._day_path(day), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise KeyError(day)
+
+        refs = set(manifest.pop('_refs', []))
+        months = manifest.pop('_months', None) or self._all_months()  # Anciens manifestes : tous les mois
+        objects = {}
+        for month in months:
+            objects.update(self.month_objects(month))
+
+        def resolve(ref):
+            if isinstance(ref, list):
+                digest, volatile = ref
+                return {**objects[digest], **volatile}
+            return objects[ref]
+
+        data = {}
+        for key, value in manifest.items():
+            if key not in refs:
+                data[key] = value
+            elif isinstance(value, list):
+                data[key] = [resolve(ref) for ref in value]
+            else:
+                data[key] = resolve(value)
+        return data
+
+def file_day(path, data):
+    """Jour d'un fichier : veille-AAAA-MM-JJ.json, sinon son champ date"""
+    match = DAY_FILE_RE.search(path)
+    if match:
+        return match.group(1)
+    return (data.get('date') or datetime.now().isoformat())[:10]
+
+def _load_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def migrate(paths, remove=False, archive=None):
+    """Archive des fichiers veille-*.json ; les supprime si remove et si la relecture est identique"""
+    archive = archive or Archive()
+
+    for path in paths:
+        data = _load_file(path)
+        day = file_day(path, data)
+        added = archive.add(data, day)
+
+        if archive.load(day) != data:
+            print(f"❌ {path}: relecture différente, fichier conservé")
+            continue
+
+        print(f"✅ {path} -> {day} ({added} nouveaux objets)")
+        if remove:
+            os.remove(path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive adressée par contenu des fichiers veille")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    migrate_cmd = commands.add_parser('migrate', help="archiver les veille-AAAA-MM-JJ.json")
+    migrate_cmd.add_argument('files', nargs='*')
+    migrate_cmd.add_argument('--remove', action='store_true', help="supprimer les fichiers archivés")
+
+    add_cmd = commands.add_parser('add', help="archiver un fichier (ex. veille-latest.json)")
+    add_cmd.add_argument('file')
+    add_cmd.add_argument('--day', help="jour, ou AAAA-MM-JJ-<suffixe> (défaut : nom du fichier ou champ date)")
+
+    show_cmd = commands.add_parser('show', help="reconstruire un jour")
+    show_cmd.add_argument('day')
+
+    commands.add_parser('list', help="jours archivés")
+
+    args = parser.parse_args(argv)
+    archive = Archive()
+
+    if args.command == 'migrate':
+        files = args.files or sorted(path for path in glob.glob('veille-*.json') if DAY_FILE_RE.search(path))
+        migrate(files, remove=args.remove, archive=archive)
+    elif args.command == 'add':
+        data = _load_file(args.file)
+        day = args.day or file_day(args.file, data)
+        print(f"✅ {args.file} -> {day} ({archive.add(data, day)} nouveaux objets)")
+    elif args.command == 'show':
+        try:
+            json.dump(archive.load(args.day), sys.stdout, ensure_ascii=False, indent=2)
+            print()
+        except KeyError:
+            print(f"❌ Jour non archivé: {args.day}", file=sys.stderr)
+            return 1
+    elif args.command == 'list':
+        for day in archive.days():
+            print(day)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
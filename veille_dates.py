@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Lecture des dates de publication
+pubDate RSS (RFC 822) et ISO des API (Reddit, HN), partagée par le store
+et le calendrier d'interrogation RSS.
+"""
+
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+def parse_pub_date(value):
+    """Timestamp d'une pubDate RSS (RFC 822) ou ISO, None si illisible"""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        pass
+    try:
+        # Python < 3.11 : pas de suffixe "Z" (HN : 2026-03-01T12:00:00.000Z)
+        return datetime.fromisoformat(value.removesuffix('Z') + ('+00:00' if value.endswith('Z') else '')).timestamp()
+    except ValueError:
+        return None
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Déduplication
+- Quasi-doublons dans un run (shingles de mots + index inversé) : un même
+  tweet vu via Google (snippet tronqué, préfixé de sa date) et via Nitter
+  (texte complet, "RT by @x:", tweet cité) n'a pas le même texte ; deux
+  textes sont des doublons si la plupart des paires de mots du plus court
+  se retrouvent dans l'autre. Deux items dont les ids canoniques
+  (veille_urls) diffèrent ne sont jamais fusionnés. Les paires de mots
+  trop fréquentes ("claude code" dans toute la veille) ne servent pas à
+  trouver les candidats : chaque ajout reste en temps quasi constant.
+- Clé et version des items (store, veille_store) : un item est le même
+  d'un run à l'autre s'il a la même clé, modifié si sa version change.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from urllib.parse import urlsplit
+
+import veille_urls
+
+# Configuration
+CONTAINMENT = 0.7  # Part des shingles du texte le plus court présents dans l'autre
+MIN_SHINGLES = 3  # En dessous (ex. "gm"), seul un texte identique est un doublon
+MAX_POSTINGS = 64  # Au-delà, une paire de mots est trop fréquente pour désigner des candidats
+
+URL_RE = re.compile(r'https?://\S+|pic\.twitter\.com/\S+')
+DATE_PREFIX_RE = re.compile(r'^[^—\n]{1,30}\s—\s')  # Snippet Google : "3 days ago — ", "27 févr. 2026 — "
+NON_WORD_RE = re.compile(r'[^\w@#]+')
+
+def normalize_text(text):
+    """Minuscules, sans date de snippet, URLs ni ponctuation, espaces normalisés"""
+    text = DATE_PREFIX_RE.sub(' ', (text or '').strip())
+    text = URL_RE.sub(' ', text.lower())
+    text = text.replace('…', ' ').replace('...', ' ')
+    return NON_WORD_RE.sub(' ', text).strip()
+
+def shingles(normalized):
+    """Paires de mots consécutifs d'un texte normalisé (le mot seul s'il n'y en a qu'un)"""
+    words = normalized.split()
+    if len(words) < 2:
+        return set(words)
+    return {f'{a} {b}' for a, b in zip(words, words[1:])}
+
+class NearDuplicateIndex:
+    """Index des textes déjà vus ; add() dit si un texte est nouveau"""
+
+    def __init__(self, containment=CONTAINMENT, min_shingles=MIN_SHINGLES, max_postings=MAX_POSTINGS):
+        self.containment = containment
+        self.min_shingles = min_shingles
+        self.max_postings = max_postings
+        self.entries = []  # (shingles, item_id)
+        self.postings = {}  # shingle -> indices dans entries (None : trop fréquente)
+        self.exact = {}  # texte normalisé -> indices dans entries
+        self.item_ids = set()
+
+    def _distinct(self, item_id, index):
+        """Vrai si les deux items ont des ids canoniques différents"""
+        other_id = self.entries[index][1]
+        return item_id is not None and other_id is not None and other_id != item_id
+
+    def contains(self, text, item_id=None):
+        """Vrai si le même item (item_id) ou un texte identique / proche a déjà été ajouté"""
+        normalized = normalize_text(text)
+        return self._contains(normalized, shingles(normalized), item_id)
+
+    def _contains(self, normalized, text_shingles, item_id=None):
+        if item_id is not None and item_id in self.item_ids:
+            return True
+
+        if any(not self._distinct(item_id, index) for index in self.exact.get(normalized, ())):
+            return True
+
+        # Candidats : textes partageant une paire de mots peu fréquente
+        shared = Counter()
+        frequent = 0
+        for shingle in text_shingles:
+            postings = self.postings.get(shingle, ())
+            if postings is None:
+                frequent += 1
+            else:
+                shared.update(postings)
+
+        for index, count in shared.items():
+            other_shingles = self.entries[index][0]
+            smallest = min(len(text_shingles), len(other_shingles))
+            # Borne haute (paires fréquentes toutes communes) avant le calcul exact
+            if (smallest < self.min_shingles or count + frequent < self.containment * smallest
+                    or self._distinct(item_id, index)):
+                continue
+            if len(text_shingles & other_shingles) >= self.containment * smallest:
+                return True
+        return False
+
+    def add(self, text, item_id=None):
+        """
+        Ajoute le texte ; retourne False si c'était un quasi-doublon.
+        item_id (clé veille_urls) repère le même tweet sous des textes différents.
+        """
+        normalized = normalize_text(text)
+        text_shingles = shingles(normalized)
+
+        if self._contains(normalized, text_shingles, item_id):
+            return False
+
+        index = len(self.entries)
+        self.entries.append((text_shingles, item_id))
+        if item_id is not None:
+            self.item_ids.add(item_id)
+        self.exact.setdefault(normalized, []).append(index)
+        for shingle in text_shingles:
+            postings = self.postings.setdefault(shingle, [])
+            if postings is None:
+                continue
+            if len(postings) >= self.max_postings:
+                self.postings[shingle] = None  # Paire trop fréquente : plus indexée
+            else:
+                postings.append(index)
+        return True
+
+def dedupe(items, key='content', index=None):
+    """Garde le premier de chaque groupe de quasi-doublons (ordre conservé)"""
+    index = index or NearDuplicateIndex()
+    return [
+        item for item in items
+        if index.add(item.get(key, ''), veille_urls.item_key(item.get('url')))
+    ]
+
+# Clé et version des items
+
+UPDATE_FIELDS = ('title', 'content', 'selftext')  # Un changement ici = mise à jour (pas les scores)
+
+def hash64(value):
+    """Hash stable 64 bits d'une chaîne"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def normalized_url(url):
+    """URL sans schéma, www., fragment ni slash final (hôte en minuscules)"""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').removeprefix('www.')
+    path = parts.path.rstrip('/')
+    query = f'?{parts.query}' if parts.query else ''
+    return f'{host}{path}{query}'
+
+def item_key(item):
+    """
+    Clé 64 bits d'un item : (plateforme, id) canonique si l'URL est reconnue
+    (veille_urls), sinon hash de l'URL normalisée ou du texte (2 bits bas à 0)
+    """
+    url = item.get('url') or ''
+    key = veille_urls.item_key(url)
+    if key is not None:
+        return key
+
+    value = normalized_url(url) if url else normalize_text(item.get('content') or item.get('title') or '')
+    return hash64(value) & ~3
+
+def item_version(item):
+    """Hash des champs éditables : change si l'item a été modifié"""
+    return hash64('\x1f'.join(str(item.get(field) or '') for field in UPDATE_FIELDS))
+
+if __name__ == "__main__":
+    # Vérification sur des paires réelles : flux Nitter / snippet Google du même tweet
+    nitter = (
+        "In the next version of Claude Code..\n\nWe're introducing two new Skills: /simplify and /batch. "
+        "I have been using both daily, and am excited to share them with everyone.\n\nCombined, these kills "
+        "automate much of the work it used to take to (1) shepherd a pull request to production and (2) "
+        "perform straightforward, parallelizable code migrations.\nIn the next version of Claude Code..\n\n"
+        "We're introducing two new Skills: /simplify and /batch. I have been using both daily, and am "
+        "excited to share them with everyone."
+    )
+    snippets = [
+        "In the next version of Claude Code.. We're introducing two new Skills: /simplify and /batch. "
+        "I have been using both daily, and am excited to share ...",
+        "3 days ago — In the next version of Claude Code.. We're introducing two new Skills: "
+        "/simplify and /batch. I have been using both daily, and am ...",
+        "27 févr. 2026 — In the next version of Claude Code.. We're introducing two new Skills: "
+        "/simplify and /batch. I have been using both…",
+    ]
+    for snippet in snippets:
+        index = NearDuplicateIndex()
+        index.add(nitter)
+        assert index.contains(snippet), snippet
+
+    retweet = (
+        "RT by @bcherny: 4% of GitHub public commits are being authored by Claude Code right now. At the "
+        "current trajectory, we believe that Claude Code will be 20%+ of all daily commits by the end of "
+        "2026. While you blinked, AI consumed all of software development."
+    )
+    index = NearDuplicateIndex()
+    index.add(retweet)
+    assert index.contains("1 day ago — 4% of GitHub public commits are being authored by Claude Code "
+                          "right now. At the current trajectory, we believe that Claude Code will be ...")
+
+    # Tweets différents d'un même fil : pas des doublons
+    batch = ("R to @bcherny: /batch\n\nInteractively plan out code migrations, then execute in parallel "
+             "using dozens of agents.")
+    simplify = ("R to @bcherny: /simplify\n\nUse parallel agents to improve code quality, tune code "
+                "efficiency, and ensure CLAUDE.md compliance.")
+    index = NearDuplicateIndex()
+    index.add(batch)
+    assert not index.contains(simplify)
+
+    # Même texte court, ids canoniques différents : deux tweets distincts
+    index = NearDuplicateIndex()
+    index.add("gm", item_id=1 << 2)
+    assert not index.contains("gm", item_id=2 << 2)
+    assert index.contains("gm")
+
+    # Passage à l'échelle : toutes les entrées partagent "claude code", le
+    # coût par item ne doit pas croître avec le nombre d'items
+    import random
+    import time
+
+    def per_item(count):
+        rng = random.Random(count)
+        vocabulary = [f'mot{i}' for i in range(5000)]
+        items = [{'content': 'Claude Code ' + ' '.join(rng.choice(vocabulary) for _ in range(20))}
+                 for _ in range(count)]
+        start = time.perf_counter()
+        dedupe(items)
+        return (time.perf_counter() - start) / count
+
+    small, large = per_item(2000), per_item(16000)
+    assert large < 3 * small, f"coût par item : {small * 1e6:.0f} µs à 2k, {large * 1e6:.0f} µs à 16k"
+
+    print(f"✅ Déduplication : paires vérifiées, {large * 1e6:.0f} µs par item à 16k items")
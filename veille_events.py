@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Événements de progression de la veille (source / requête terminée, résumé,
+données écrites), poussés aux dashboards en Server-Sent Events par server.py.
+
+Côté scraper, emit() passe l'événement au sink installé (serveur dans le
+même process), ou l'écrit sur stdout sous forme de ligne "@@event {json}"
+si VEILLE_EVENTS=1 (scraper lancé en sous-process par le serveur).
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+EVENT_PREFIX = '@@event '
+KEEPALIVE = 15  # Secondes entre deux commentaires SSE si aucun événement
+
+_sink = None
+
+def set_sink(callback):
+    """Envoie les événements émis à callback(event) (None : retour au mode stdout)"""
+    global _sink
+    _sink = callback
+
+def emit(event, **data):
+    """Émet un événement {'event': ..., 'time': ..., **data}"""
+    payload = {'event': event, 'time': time.time(), **data}
+
+    if _sink:
+        _sink(payload)
+    elif os.environ.get('VEILLE_EVENTS') == '1':
+        print(EVENT_PREFIX + json.dumps(payload, ensure_ascii=False), flush=True)
+
+def parse_line(line):
+    """Événement contenu dans une ligne de sortie du scraper, None sinon"""
+    if not line.startswith(EVENT_PREFIX):
+        return None
+    try:
+        return json.loads(line[len(EVENT_PREFIX):])
+    except ValueError:
+        return None
+
+def format_sse(payload, event_id=None):
+    """Message SSE (event / id / data)"""
+    lines = [f"event: {payload.get('event', 'message')}"]
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append('data: ' + json.dumps(payload, ensure_ascii=False))
+    return '\n'.join(lines) + '\n\n'
+
+class EventBus:
+    """Diffusion des événements à chaque abonné (une file par connexion SSE)"""
+
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.last_id = 0
+
+    def publish(self, payload):
+        with self.lock:
+            self.last_id += 1
+            event_id = self.last_id
+            subscribers = list(self.subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event_id, payload))
+            except queue.Full:
+                pass  # Client trop lent : il rattrapera via /api/items
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.max_pending)
+        with self.lock:
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def stream(self, initial=()):
+        """
+        Générateur de messages SSE pour une connexion : `initial` d'abord
+        (ex. statut courant), puis les événements publiés, avec un
+        commentaire keep-alive toutes les KEEPALIVE secondes
+        """
+        subscriber = self.subscribe()
+        try:
+            for payload in initial:
+                yield format_sse(payload)
+
+            while True:
+                try:
+                    event_id, payload = subscriber.get(timeout=KEEPALIVE)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_sse(payload, event_id)
+        finally:
+            self.unsubscribe(subscriber)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Client HTTP partagé par tous les scrapers
+Une seule session keep-alive (pool de connexions par hôte), en-têtes et
+timeouts configurés à un seul endroit.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import veille_state
+
+# Configuration
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+DEFAULT_TIMEOUT = 15
+POOL_CONNECTIONS = 16  # Nombre d'hôtes gardés en pool
+POOL_MAXSIZE = 8  # Connexions keep-alive par hôte
+
+# urllib3 ne décode le brotli que si le module est installé
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+DEFAULT_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Accept': '*/*',
+    'Connection': 'keep-alive',
+}
+
+# Débit autorisé par hôte : (requêtes par seconde, burst). None = pas de limite.
+HOST_RATES = {
+    'www.google.com': (0.2, 1),
+    'www.reddit.com': (0.5, 2),
+    'hn.algolia.com': (2.0, 4),
+    'cdn.syndication.twimg.com': (0.5, 2),
+    'api.anthropic.com': None,
+    'openrouter.ai': None,
+}
+DEFAULT_RATE = (1.0, 2)  # Nitter et autres hôtes
+RATE_LIMIT_BACKOFF = 30  # Pause par défaut après un 429 sans Retry-After
+MAX_RETRY_WAIT = 60  # Au-delà, on ne retente pas dans ce run
+MAX_RETRIES = 1
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Retourne la session partagée (créée au premier appel)"""
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(DEFAULT_HEADERS)
+
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+
+                _session = session
+
+    return _session
+
+class TokenBucket:
+    """Seau à jetons d'un hôte, avec blocage temporaire après un 429"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Prend un jeton et retourne le temps à attendre avant de l'utiliser"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+
+            deficit = -self.tokens / self.rate if self.tokens < 0 else 0
+            return max(deficit, self.blocked_until - now)
+
+    def block(self, seconds):
+        """Suspend l'hôte pendant `seconds` (Retry-After / 429)"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+class RateLimiter:
+    """
+    Limiteur de débit par hôte (un seau à jetons par hôte). Avec share=N,
+    chaque hôte n'a que 1/N de son débit et de son burst : N process qui
+    interrogent les mêmes hôtes restent ensemble dans la limite.
+    """
+
+    def __init__(self, rates=None, default=DEFAULT_RATE, share=1):
+        self.rates = HOST_RATES if rates is None else rates
+        self.default = default
+        self.share = share
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def set_share(self, share):
+        """Partage le débit de chaque hôte entre `share` process"""
+        with self.lock:
+            self.share = share
+            self.buckets = {}
+
+    def bucket(self, host):
+        with self.lock:
+            if host not in self.buckets:
+                rate = self.rates.get(host, self.default)
+                self.buckets[host] = TokenBucket(rate[0] / self.share, rate[1] / self.share) if rate else None
+            return self.buckets[host]
+
+    def acquire(self, host):
+        """Attend que l'hôte accepte une nouvelle requête"""
+        bucket = self.bucket(host)
+        if bucket:
+            wait = bucket.reserve()
+            if wait > 0:
+                time.sleep(wait)
+
+    def block(self, host, seconds):
+        bucket = self.bucket(host)
+        if bucket:
+            bucket.block(seconds)
+
+RATE_LIMITER = RateLimiter()
+
+def retry_after(response):
+    """Délai Retry-After en secondes (entier ou date HTTP), None si absent"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def request(method, url, headers=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """
+    Requête via la session partagée ; les en-têtes passés complètent ceux par défaut.
+    Passe par le limiteur de l'hôte et respecte les 429 / Retry-After.
+    """
+    host = urlsplit(url).hostname or ''
+
+    for attempt in range(MAX_RETRIES + 1):
+        RATE_LIMITER.acquire(host)
+        response = get_session().request(method, url, headers=headers, timeout=timeout, **kwargs)
+
+        if response.status_code not in (429, 503):
+            return response
+
+        delay = retry_after(response)
+        if response.status_code == 503 and delay is None:
+            return response
+
+        delay = RATE_LIMIT_BACKOFF if delay is None else delay
+        RATE_LIMITER.block(host, delay + random.uniform(0, 1))
+        print(f"⏳ {host} rate limited ({response.status_code}), pause {delay:.0f}s")
+
+        if attempt == MAX_RETRIES or delay > MAX_RETRY_WAIT:
+            return response
+
+        response.close()
+
+    return response
+
+def get(url, headers=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """GET via la session partagée"""
+    return request('GET', url, headers=headers, timeout=timeout, **kwargs)
+
+def post(url, headers=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """POST via la session partagée"""
+    return request('POST', url, headers=headers, timeout=timeout, **kwargs)
+
+class ValidatorCache:
+    """
+    Cache disque des validateurs HTTP (ETag / Last-Modified) par URL,
+    avec le contenu déjà parsé à resservir quand le serveur répond 304
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.entries = veille_state.load_state(name, {})
+        self.lock = threading.Lock()
+        self.changed = set()
+
+    def headers(self, url):
+        """En-têtes conditionnels à envoyer pour cette URL"""
+        with self.lock:
+            entry = self.entries.get(url)
+
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def payload(self, url):
+        """Contenu parsé mémorisé lors du dernier 200"""
+        with self.lock:
+            entry = self.entries.get(url)
+        return entry['payload'] if entry else None
+
+    def store(self, url, response, payload):
+        """Mémorise les validateurs d'une réponse 200 (s'il y en a) et le contenu parsé"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+
+        # Le contenu est gardé même sans validateurs : les scrapers s'en servent
+        # aussi pour arrêter la lecture au premier élément déjà connu
+        with self.lock:
+            self.entries[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'payload': payload
+            }
+            self.changed.add(url)
+
+    def save(self):
+        """
+        Persiste les entrées modifiées, fusionnées avec le fichier sur disque
+        (d'autres process peuvent partager le cache)
+        """
+        with self.lock:
+            if self.changed:
+                updates = {url: self.entries[url] for url in self.changed}
+                self.entries = veille_state.merge_state(self.name, updates)
+                self.changed = set()
+
+def conditional_get(url, cache, headers=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """
+    GET conditionnel : envoie If-None-Match / If-Modified-Since connus.
+    Retourne (response, payload) ; payload est le contenu en cache si 304, sinon None.
+    """
+    request_headers = dict(headers or {})
+    request_headers.update(cache.headers(url))
+
+    response = get(url, headers=request_headers, timeout=timeout, **kwargs)
+
+    if response.status_code == 304:
+        return response, cache.payload(url)
+
+    return response, None
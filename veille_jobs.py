@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+File de jobs persistante (SQLite, .veille/jobs.db)
+Un scraping est un job parent découpé en sous-jobs par source, exécutés en
+parallèle ; quand ils sont tous terminés, le parent repasse en file pour
+l'étape finale (fusion, résumé, sauvegarde). Un déclenchement identique à
+un job encore en attente lui est rattaché (coalescing) au lieu d'en créer
+un nouveau. Les jobs interrompus par un redémarrage sont repris.
+Les résultats des sous-jobs (items) sont effacés une fois l'étape finale
+passée, les jobs terminés supprimés après JOB_RETENTION.
+
+Statuts : waiting (parent, sous-jobs en cours), queued, running, done, error.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import veille_state
+
+JOBS_FILE = 'jobs.db'
+FINISHED = ('done', 'error')
+POLL_INTERVAL = 1.0  # Secondes entre deux recherches de job si la file est vide
+JOB_RETENTION = 7 * 24 * 3600  # Jobs terminés gardés une semaine (/api/jobs/<id>)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    key TEXT NOT NULL,
+    parent INTEGER REFERENCES jobs (id),
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_parent ON jobs (parent);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status);
+"""
+
+def job_key(kind, params):
+    """Clé de coalescing : type + paramètres normalisés"""
+    return kind + ':' + json.dumps(params, sort_keys=True, ensure_ascii=False)
+
+class JobQueue:
+    """Jobs persistants ; toutes les transitions passent par cet objet"""
+
+    def __init__(self, name=JOBS_FILE):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(veille_state.state_path(name), check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+
+        # Jobs interrompus par un arrêt du serveur : relancés
+        with self.lock, self.db:
+            self.db.execute("UPDATE jobs SET status = 'queued', started = NULL WHERE status = 'running'")
+            self._prune()
+
+    def _prune(self):
+        """Supprime les jobs terminés depuis plus de JOB_RETENTION (avec leurs sous-jobs)"""
+        old = "SELECT id FROM jobs WHERE parent IS NULL AND status IN ('done', 'error') AND finished < ?"
+        cutoff = time.time() - JOB_RETENTION
+        self.db.execute(f'DELETE FROM jobs WHERE parent IN ({old})', (cutoff,))
+        self.db.execute(f'DELETE FROM jobs WHERE id IN ({old})', (cutoff,))
+
+    def enqueue(self, kind, params, children=()):
+        """
+        Ajoute un job (avec ses sous-jobs [(kind, params)]) ; si un job
+        identique attend encore sans avoir démarré, le retourne à la place.
+        Retourne (job_id, coalesced).
+        """
+        key = job_key(kind, params)
+        now = time.time()
+
+        with self.lock, self.db:
+            pending = self.db.execute(
+                "SELECT id FROM jobs AS j WHERE key = ? AND parent IS NULL AND status IN ('waiting', 'queued') "
+                "AND NOT EXISTS (SELECT 1 FROM jobs WHERE parent = j.id AND status != 'queued') "
+                "ORDER BY id LIMIT 1",
+                (key,)
+            ).fetchone()
+            if pending:
+                return pending['id'], True
+
+            job_id = self.db.execute(
+                'INSERT INTO jobs (kind, params, key, status, created) VALUES (?, ?, ?, ?, ?)',
+                (kind, json.dumps(params, ensure_ascii=False), key, 'waiting' if children else 'queued', now)
+            ).lastrowid
+
+            for child_kind, child_params in children:
+                self.db.execute(
+                    'INSERT INTO jobs (kind, params, key, parent, status, created) VALUES (?, ?, ?, ?, ?, ?)',
+                    (child_kind, json.dumps(child_params, ensure_ascii=False),
+                     job_key(child_kind, child_params), job_id, 'queued', now)
+                )
+
+        return job_id, False
+
+    def claim(self):
+        """Passe le plus ancien job en file à 'running' et le retourne (None si vide)"""
+        with self.lock, self.db:
+            row = self.db.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1").fetchone()
+            if not row:
+                return None
+            self.db.execute("UPDATE jobs SET status = 'running', started = ? WHERE id = ?", (time.time(), row['id']))
+
+        job = self._to_dict(row)
+        job['status'] = 'running'
+        return job
+
+    def finish(self, job_id, result=None, error=None):
+        """
+        Termine un job ; si c'était le dernier sous-job de son parent, le
+        parent repasse en file (étape finale). Un parent terminé libère les
+        résultats de ses sous-jobs, déjà consommés.
+        """
+        with self.lock, self.db:
+            self.db.execute(
+                'UPDATE jobs SET status = ?, finished = ?, result = ?, error = ? WHERE id = ?',
+                ('error' if error else 'done', time.time(),
+                 json.dumps(result, ensure_ascii=False) if result is not None else None, error, job_id)
+            )
+            row = self.db.execute('SELECT parent FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            parent = row['parent'] if row else None
+
+            if parent is None:
+                self.db.execute('UPDATE jobs SET result = NULL WHERE parent = ?', (job_id,))
+                self._prune()
+            else:
+                remaining = self.db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE parent = ? AND status NOT IN ('done', 'error')", (parent,)
+                ).fetchone()[0]
+                if not remaining:
+                    self.db.execute("UPDATE jobs SET status = 'queued' WHERE id = ? AND status = 'waiting'", (parent,))
+
+    def children(self, job_id, with_result=False):
+        with self.lock:
+            rows = self.db.execute('SELECT * FROM jobs WHERE parent = ? ORDER BY id', (job_id,)).fetchall()
+        return [self._to_dict(row, with_result) for row in rows]
+
+    def get(self, job_id):
+        """Job et ses sous-jobs (sans les résultats des sous-jobs), None s'il n'existe pas"""
+        with self.lock:
+            row = self.db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if not row:
+            return None
+
+        job = self._to_dict(row, with_result=True)
+        job['children'] = self.children(job_id)
+        return job
+
+    def active(self):
+        """Jobs parents non terminés"""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT * FROM jobs WHERE parent IS NULL AND status NOT IN ('done', 'error') ORDER BY id"
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    @staticmethod
+    def _to_dict(row, with_result=False):
+        job = {
+            'id': row['id'],
+            'kind': row['kind'],
+            'params': json.loads(row['params']),
+            'parent': row['parent'],
+            'status': row['status'],
+            'created': row['created'],
+            'started': row['started'],
+            'finished': row['finished'],
+            'error': row['error']
+        }
+        if with_result:
+            job['result'] = json.loads(row['result']) if row['result'] else None
+        return job
+
+class JobRunner:
+    """
+    Exécute les jobs de la file sur un pool de threads : handlers[kind](job, queue)
+    retourne le résultat (sérialisable JSON) ou lève une exception.
+    on_change(job, status) est appelé à chaque démarrage / fin de job.
+    """
+
+    def __init__(self, queue, handlers, workers=3, on_change=None):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = workers
+        self.on_change = on_change or (lambda job, status: None)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self.slots = threading.Semaphore(workers)
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._loop, name='job-scheduler', daemon=True)
+            self.thread.start()
+
+    def notify(self):
+        """Réveille le planificateur (nouveau job)"""
+        self.wakeup.set()
+
+    def _loop(self):
+        while True:
+            self.slots.acquire()
+            job = self.queue.claim()
+            if job is None:
+                self.slots.release()
+                self.wakeup.wait(POLL_INTERVAL)
+                self.wakeup.clear()
+                continue
+            self.executor.submit(self._run, job)
+
+    def _run(self, job):
+        try:
+            self.on_change(job, 'running')
+            try:
+                result = self.handlers[job['kind']](job, self.queue)
+            except Exception as e:
+                self.queue.finish(job['id'], error=str(e)[:500] or type(e).__name__)
+                self.on_change(job, 'error')
+            else:
+                self.queue.finish(job['id'], result=result)
+                self.on_change(job, 'done')
+        finally:
+            self.slots.release()
+            self.notify()  # Le parent est peut-être prêt
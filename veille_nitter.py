@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Gestion du pool d'instances Nitter
+Score de santé persistant par instance (taux de succès + latence), essais
+dans l'ordre de santé et requête "hedgée" sur l'instance suivante quand la
+première tarde au-delà du percentile de latence observé. Une tentative
+échoue en retournant None (ou en levant) ; un résultat vide (flux sans
+tweets) est un succès.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import veille_state
+
+# Configuration
+HEALTH_FILE = 'nitter-health.json'
+MAX_SAMPLES = 20  # Latences gardées par instance
+SUCCESS_ALPHA = 0.3  # Poids du dernier résultat dans le taux de succès
+HEDGE_PERCENTILE = 0.9
+HEDGE_MIN_DELAY = 0.5
+HEDGE_DEFAULT_DELAY = 3.0  # Tant qu'on n'a pas assez de mesures
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='nitter')
+
+class InstancePool:
+    """Pool d'instances ordonné par santé, scores persistés entre les runs"""
+
+    def __init__(self, instances, name=HEALTH_FILE, hedge=True):
+        self.instances = list(instances)
+        self.name = name
+        self.hedge = hedge
+        self.lock = threading.Lock()
+        self.scores = veille_state.load_state(name, {})
+
+    def _score(self, instance):
+        return self.scores.setdefault(instance, {'success': 1.0, 'latencies': []})
+
+    def ordered(self):
+        """Instances triées : meilleur taux de succès puis latence médiane la plus basse"""
+        with self.lock:
+            def key(instance):
+                score = self._score(instance)
+                latencies = sorted(score['latencies'])
+                median = latencies[len(latencies) // 2] if latencies else 0
+                return (-round(score['success'], 2), median)
+
+            return sorted(self.instances, key=key)
+
+    def record(self, instance, ok, latency):
+        """Enregistre le résultat d'un essai"""
+        with self.lock:
+            score = self._score(instance)
+            score['success'] = (1 - SUCCESS_ALPHA) * score['success'] + SUCCESS_ALPHA * (1.0 if ok else 0.0)
+            if ok:
+                score['latencies'] = (score['latencies'] + [round(latency, 3)])[-MAX_SAMPLES:]
+
+    def hedge_delay(self):
+        """Délai avant de lancer la requête de secours (percentile des latences réussies)"""
+        with self.lock:
+            latencies = sorted(l for s in self.scores.values() for l in s['latencies'])
+
+        if len(latencies) < 5:
+            return HEDGE_DEFAULT_DELAY
+
+        index = min(len(latencies) - 1, int(len(latencies) * HEDGE_PERCENTILE))
+        return max(HEDGE_MIN_DELAY, latencies[index])
+
+    def save(self):
+        """Persiste les scores (fusionnés par instance avec ceux des autres process)"""
+        with self.lock:
+            veille_state.merge_state(self.name, self.scores)
+
+    def _timed(self, attempt, instance):
+        start = time.monotonic()
+        try:
+            result = attempt(instance)
+        except Exception as e:
+            print(f"  ⚠️ {instance} failed: {e}")
+            result = None
+        self.record(instance, result is not None, time.monotonic() - start)
+        return result
+
+    def fetch(self, attempt):
+        """
+        Appelle attempt(instance) sur les instances par ordre de santé et
+        retourne le premier résultat obtenu, même vide (None si toutes échouent).
+        """
+        queue = self.ordered()
+        delay = self.hedge_delay()
+        pending = set()
+
+        def launch():
+            instance = queue.pop(0)
+            print(f"  → Trying {instance}...")
+            pending.add(_executor.submit(self._timed, attempt, instance))
+
+        launch()
+        while pending:
+            timeout = delay if (self.hedge and queue) else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # L'instance en cours tarde : on lance la suivante en parallèle
+                launch()
+                continue
+
+            for future in done:
+                pending.discard(future)
+                result = future.result()
+                if result is not None:
+                    return result
+
+                # Échec : on passe tout de suite à l'instance suivante
+                if queue:
+                    launch()
+
+        return None
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Écriture des fichiers de sortie (veille-latest.json, archive du jour)
+Le dict est sérialisé une seule fois ; chaque fichier est écrit dans un
+fichier temporaire puis renommé (os.replace) : un lecteur (server.py) voit
+l'ancienne ou la nouvelle version, jamais un fichier à moitié écrit. Les
+autres noms sont des liens physiques (copie si impossible), et des
+variantes .gz / .br précompressées peuvent être produites pour le serveur.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+LATEST_FILE = 'veille-latest.json'
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11  # Compression faite une fois par run, lue à chaque requête
+
+def serialize(data):
+    """JSON indenté, en UTF-8"""
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+def write_atomic(path, payload):
+    """Écrit des octets via un fichier temporaire du même dossier + rename"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def _link_atomic(source, path):
+    """Lien physique vers `source` remplaçant `path` de façon atomique (copie si impossible)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f'.{os.path.basename(path)}.{os.getpid()}.link')
+
+    try:
+        if os.path.lexists(tmp_path):
+            os.unlink(tmp_path)
+        os.link(source, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError:
+        with open(source, 'rb') as f:
+            write_atomic(path, f.read())
+
+def compressed_variants(payload):
+    """{extension: octets} des variantes précompressées disponibles"""
+    variants = {'.gz': gzip.compress(payload, GZIP_LEVEL, mtime=0)}
+    if brotli:
+        variants['.br'] = brotli.compress(payload, quality=BROTLI_QUALITY)
+    return variants
+
+def precompress(path, payload):
+    """
+    Écrit path.gz / path.br à côté de path (après lui : une variante plus
+    ancienne que le fichier est périmée) et supprime une variante qui ne
+    peut plus être produite
+    """
+    variants = compressed_variants(payload)
+    for extension in ('.gz', '.br'):
+        if extension in variants:
+            write_atomic(path + extension, variants[extension])
+        elif os.path.exists(path + extension):
+            os.unlink(path + extension)
+
+def write_json(data, path, *aliases, compress=False):
+    """
+    Sérialise `data` une fois, l'écrit dans `path` puis sous chaque alias
+    (liens physiques). compress=True ajoute les variantes .gz / .br de `path`
+    (le fichier servi). Retourne les octets écrits.
+    """
+    payload = serialize(data)
+    write_atomic(path, payload)
+
+    for alias in aliases:
+        _link_atomic(path, alias)
+
+    if compress:
+        precompress(path, payload)
+
+    return payload
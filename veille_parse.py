@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Parsing rapide des pages HTML (résultats Google, timelines Nitter) et des flux RSS
+lxml + XPath précompilés ; BeautifulSoup limité aux conteneurs utiles
+(SoupStrainer) si lxml n'est pas disponible.
+"""
+
+import re
+import xml.etree.ElementTree as ElementTree
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    HAVE_LXML = True
+    UTF8_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+except ImportError:
+    HAVE_LXML = False
+
+GOOGLE_SNIPPET_CLASSES = ('VwiC3b', 'yXK7lf', 'MUxGbd', 'st')
+
+def _has_class(name):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+if HAVE_LXML:
+    GOOGLE_RESULTS = etree.XPath(f'//div[{_has_class("g")} or @data-sokoban-container]')
+    GOOGLE_TITLE = etree.XPath('(.//h3)[1]')
+    GOOGLE_LINK = etree.XPath('(.//a)[1]')
+    GOOGLE_SNIPPET = etree.XPath('(.//*[' + ' or '.join(_has_class(c) for c in GOOGLE_SNIPPET_CLASSES) + '])[1]')
+
+    NITTER_ITEMS = etree.XPath(f'//div[{_has_class("timeline-item")}]')
+    NITTER_USERNAME = etree.XPath(f'(.//a[{_has_class("username")}])[1]')
+    NITTER_CONTENT = etree.XPath(f'(.//div[{_has_class("tweet-content")}])[1]')
+    NITTER_DATE = etree.XPath(f'(.//span[{_has_class("tweet-date")}])[1]')
+    NITTER_LINK = etree.XPath(f'(.//a[{_has_class("tweet-link")}])[1]')
+
+def clean_text(text):
+    """Espaces normalisés"""
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+def _first(xpath, element):
+    found = xpath(element)
+    return found[0] if found else None
+
+def _text(element):
+    return clean_text(element.text_content()) if element is not None else ''
+
+def _document(html):
+    """
+    Arbre lxml d'une page déjà décodée (response.text) : ré-encodée en UTF-8
+    et parsée en UTF-8 imposé, sans suivre le <meta charset> de la page
+    (sinon une page déclarée ISO-8859-1 serait décodée deux fois). Passer
+    par des octets évite le refus de lxml pour une str avec déclaration XML.
+    """
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    return lxml_html.fromstring(html, parser=UTF8_PARSER) if html.strip() else None
+
+# Google
+
+def parse_google_results(html):
+    """
+    Résultats d'une page Google : liste de dicts title / url / snippet
+    (chaînes vides si l'élément est absent).
+    """
+    if not HAVE_LXML:
+        return _parse_google_results_bs4(html)
+
+    document = _document(html)
+    if document is None:
+        return []
+
+    results = []
+    for container in GOOGLE_RESULTS(document):
+        link = _first(GOOGLE_LINK, container)
+        snippet = _first(GOOGLE_SNIPPET, container)
+        results.append({
+            'title': _text(_first(GOOGLE_TITLE, container)),
+            'url': link.get('href', '') if link is not None else '',
+            'snippet': _text(snippet)
+        })
+    return results
+
+def _parse_google_results_bs4(html):
+    # Seuls les blocs div.g sont construits (les conteneurs data-sokoban
+    # ne sont vus que par le chemin lxml)
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('div', class_='g'))
+
+    results = []
+    for container in soup.select('div.g, div[data-sokoban-container]'):
+        title = container.select_one('h3')
+        link = container.select_one('a')
+        snippet = container.select_one(', '.join(f'.{c}' for c in GOOGLE_SNIPPET_CLASSES))
+        results.append({
+            'title': clean_text(title.get_text()) if title else '',
+            'url': link.get('href', '') if link else '',
+            'snippet': clean_text(snippet.get_text()) if snippet else ''
+        })
+    return results
+
+# Nitter
+
+def parse_nitter_timeline(html):
+    """
+    Tweets d'une page de recherche / timeline Nitter : liste de dicts
+    username, username_title, content, date, date_title, link.
+    """
+    if not HAVE_LXML:
+        return _parse_nitter_timeline_bs4(html)
+
+    document = _document(html)
+    if document is None:
+        return []
+
+    tweets = []
+    for item in NITTER_ITEMS(document):
+        username = _first(NITTER_USERNAME, item)
+        content = _first(NITTER_CONTENT, item)
+        date = _first(NITTER_DATE, item)
+        date_link = date.find('a') if date is not None else None
+        link = _first(NITTER_LINK, item)
+        tweets.append({
+            'username': _text(username) if username is not None else None,
+            'username_title': username.get('title', '') if username is not None else '',
+            'content': _text(content) if content is not None else None,
+            'date': _text(date) if date is not None else None,
+            'date_title': date_link.get('title') if date_link is not None else None,
+            'link': link.get('href', '') if link is not None else None
+        })
+    return tweets
+
+def _parse_nitter_timeline_bs4(html):
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('div', class_='timeline-item'))
+
+    tweets = []
+    for item in soup.find_all('div', class_='timeline-item'):
+        username = item.find('a', class_='username')
+        content = item.find('div', class_='tweet-content')
+        date = item.find('span', class_='tweet-date')
+        date_link = date.find('a') if date else None
+        link = item.find('a', class_='tweet-link')
+        tweets.append({
+            'username': clean_text(username.get_text()) if username else None,
+            'username_title': username.get('title', '') if username else '',
+            'content': clean_text(content.get_text()) if content else None,
+            'date': clean_text(date.get_text()) if date else None,
+            'date_title': date_link.get('title') if date_link else None,
+            'link': link.get('href', '') if link else None
+        })
+    return tweets
+
+# RSS
+
+RSS_FIELDS = ('title', 'description', 'link', 'pubDate', 'guid')
+
+def iter_rss_items(stream):
+    """
+    Items d'un flux RSS lus en streaming (iterparse) : dicts title /
+    description / link / pubDate / guid, produits au fil du parsing.
+    Chaque item est libéré dès qu'il a été lu ; arrêter l'itération
+    arrête la lecture du flux.
+    """
+    if HAVE_LXML:
+        events = etree.iterparse(stream, events=('end',), tag='item', recover=True)
+    else:
+        events = ElementTree.iterparse(stream, events=('end',))
+
+    for _, element in events:
+        if element.tag != 'item':
+            continue
+
+        item = {field: (element.findtext(field) or '').strip() for field in RSS_FIELDS}
+
+        # Libère l'item et les précédents déjà traités
+        element.clear()
+        if HAVE_LXML:
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+        yield item
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Planification des requêtes multi-keywords
+Regroupe les keywords en quelques requêtes combinées (OR) par source, dans
+les limites de chaque source, puis rattache chaque résultat au(x) keyword(s)
+qu'il contient.
+"""
+
+import re
+
+def quote_term(keyword):
+    """Met entre guillemets les keywords de plusieurs mots"""
+    keyword = keyword.strip()
+    return f'"{keyword}"' if ' ' in keyword else keyword
+
+def build_query(keywords, joiner=' OR '):
+    """Requête combinée : openclaw OR "claude code" ..."""
+    return joiner.join(quote_term(kw) for kw in keywords)
+
+def plan_queries(keywords, max_terms, max_length=None, joiner=' OR ', prefix=''):
+    """
+    Découpe les keywords en groupes ; chaque groupe tient en une requête
+    d'au plus `max_terms` termes et `max_length` caractères (préfixe inclus).
+    """
+    groups = []
+    current = []
+    seen = set()
+
+    for keyword in keywords:
+        if keyword.lower() in seen:
+            continue
+        seen.add(keyword.lower())
+
+        candidate = current + [keyword]
+        too_long = max_length and len(prefix + build_query(candidate, joiner)) > max_length
+
+        if current and (len(candidate) > max_terms or too_long):
+            groups.append(current)
+            current = [keyword]
+        else:
+            current = candidate
+
+    if current:
+        groups.append(current)
+
+    return groups
+
+def _normalize(text):
+    return re.sub(r'\s+', ' ', (text or '').lower())
+
+def match_keywords(text, keywords):
+    """
+    Keywords présents dans le texte : la phrase exacte, ou à défaut tous ses
+    mots (les moteurs de recherche ne respectent pas toujours l'ordre).
+    """
+    text = _normalize(text)
+    words = set(re.findall(r'\w+', text))
+    matches = []
+
+    for keyword in keywords:
+        normalized = _normalize(keyword).strip()
+        if normalized in text or all(word in words for word in re.findall(r'\w+', normalized)):
+            matches.append(keyword)
+
+    return matches
+
+def attribute(text, keywords):
+    """
+    Keyword auquel rattacher un résultat : le premier présent dans le texte ;
+    à défaut, celui de la requête si elle n'en avait qu'un. None sinon (le
+    résultat ne correspond à aucun keyword du groupe : à écarter).
+    """
+    matches = match_keywords(text, keywords)
+    if matches:
+        return matches[0]
+    return keywords[0] if len(keywords) == 1 else None
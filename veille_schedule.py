@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Fréquence d'interrogation adaptative par compte
+Le rythme de publication de chaque compte est estimé à partir des pubDate
+de son flux RSS ; un compte prolifique est interrogé souvent, un compte
+silencieux de plus en plus rarement (back-off exponentiel, plafonné).
+État dans .veille/rss-schedule.json.
+"""
+
+import time
+
+import veille_dates
+import veille_state
+
+SCHEDULE_FILE = 'rss-schedule.json'
+MIN_INTERVAL = 15 * 60  # Compte très actif : pas plus souvent
+MAX_INTERVAL = 7 * 24 * 3600  # Compte silencieux : au moins une fois par semaine
+POSTS_PER_POLL = 3  # Vise ~3 nouveaux tweets par interrogation
+BACKOFF = 2  # Intervalle multiplié à chaque passage sans nouveau tweet
+RATE_ALPHA = 0.3  # Poids de la dernière mesure dans le rythme estimé
+
+def _clamp(interval):
+    return max(MIN_INTERVAL, min(MAX_INTERVAL, interval))
+
+class AccountSchedule:
+    """
+    Par compte : dernier tweet vu, rythme estimé (tweets / s), intervalle et
+    prochaine échéance
+    """
+
+    def __init__(self, name=SCHEDULE_FILE):
+        self.name = name
+        self.accounts = veille_state.load_state(name, {})
+        self.changed = set()
+
+    def due(self, usernames, now=None):
+        """Comptes à interroger maintenant (les comptes inconnus le sont toujours)"""
+        now = now or time.time()
+        return [username for username in usernames
+                if self.accounts.get(username, {}).get('next', 0) <= now]
+
+    def next_poll(self, username):
+        return self.accounts.get(username, {}).get('next', 0)
+
+    def observe(self, username, tweets, now=None):
+        """
+        Met à jour le compte après une interrogation : rythme estimé à partir
+        des nouveaux tweets depuis le passage précédent, nouvel intervalle
+        """
+        now = now or time.time()
+        state = self.accounts.get(username)
+        dates = sorted(filter(None, (veille_dates.parse_pub_date(tweet.get('date')) for tweet in tweets)))
+
+        if state is None:
+            # Premier passage : rythme tiré de l'historique du flux, jusqu'à
+            # maintenant (une rafale ancienne suivie d'un long silence = compte calme)
+            rate = len(dates) / max(now - dates[0], 1) if dates else 0.0
+            state = {'last_post': dates[-1] if dates else 0, 'rate': rate, 'last_poll': now}
+            interval = POSTS_PER_POLL / rate if rate else MIN_INTERVAL * BACKOFF
+        else:
+            new_posts = [date for date in dates if date > state['last_post']]
+            elapsed = max(now - state['last_poll'], 1)
+            state['rate'] = (1 - RATE_ALPHA) * state['rate'] + RATE_ALPHA * len(new_posts) / elapsed
+
+            if new_posts:
+                state['last_post'] = new_posts[-1]
+                interval = POSTS_PER_POLL / state['rate']
+            else:
+                # Rien de neuf : back-off, sans descendre sous le rythme estimé
+                expected = POSTS_PER_POLL / state['rate'] if state['rate'] else 0
+                interval = max(state['interval'] * BACKOFF, expected)
+            state['last_poll'] = now
+
+        state['interval'] = _clamp(interval)
+        state['next'] = now + state['interval']
+        self.accounts[username] = state
+        self.changed.add(username)
+
+    def save(self):
+        """Persiste les comptes observés (fusionnés avec ceux des autres process)"""
+        if not self.changed:
+            return
+        updates = {username: self.accounts[username] for username in self.changed}
+        self.accounts = veille_state.merge_state(self.name, updates)
+        self.changed = set()
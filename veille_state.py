@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+État persistant entre deux runs (caches, curseurs, scores...)
+Petits fichiers JSON dans .veille/ (ou $VEILLE_STATE_DIR)
+"""
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou limité au process
+    fcntl = None
+
+STATE_DIR = os.environ.get('VEILLE_STATE_DIR', '.veille')
+
+_lock = threading.Lock()
+
+def state_path(name):
+    """Chemin d'un fichier d'état (crée le dossier si besoin)"""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.join(STATE_DIR, name)
+
+def load_state(name, default):
+    """Charge un état JSON, retourne `default` s'il est absent ou illisible"""
+    try:
+        with open(state_path(name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except Exception as e:
+        print(f"⚠️ État {name} illisible, ignoré: {e}")
+        return default
+
+def save_state(name, data):
+    """Écrit un état JSON de façon atomique (fichier temporaire + rename)"""
+    path = state_path(name)
+    fd, tmp_path = tempfile.mkstemp(dir=STATE_DIR, prefix=f'.{name}.', suffix='.tmp')
+
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+@contextmanager
+def file_lock(name):
+    """Verrou inter-process sur un fichier d'état (plusieurs scrapers / shards)"""
+    with _lock, open(state_path(f'{name}.lock'), 'w') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def merge_state(name, updates):
+    """
+    Fusionne des entrées dans un état JSON (dict) sans écraser celles
+    écrites entre-temps par un autre process
+    """
+    with file_lock(name):
+        data = load_state(name, {})
+        data.update(updates)
+        save_state(name, data)
+        return data
+
+def update_state(name, default, update):
+    """
+    Lit, modifie (update(data) modifie en place) et réécrit un état sous
+    verrou inter-process (serveur et daemon : curseurs Reddit, watermarks HN)
+    """
+    with file_lock(name):
+        data = load_state(name, default)
+        update(data)
+        save_state(name, data)
+        return data
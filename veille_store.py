@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Stockage des items (SQLite, .veille/items.db)
+Chaque item est inséré une fois sous sa clé canonique (veille_dedup.item_key)
+et réécrit seulement s'il a changé ; un numéro de séquence croissant marque
+chaque insertion / modification, y compris des seuls scores (points,
+commentaires), pour que les clients delta (/api/items) les reçoivent.
+Index sur la source, le keyword, la date de publication (ISO UTC, NULL si
+inconnue), la date d'ingestion et la séquence : veille-latest.json (items
+vus dans la semaine) et les archives du jour deviennent des vues,
+l'historique une requête indexée.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+import veille_dates
+import veille_dedup
+import veille_state
+
+STORE_FILE = 'items.db'
+SOURCES = ('twitter', 'reddit', 'hackernews')
+LATEST_WINDOW = 7 * 24 * 3600  # veille-latest.json : items vus dans la semaine
+RUN_FIELDS = ('timestamp',)  # Heure du scraping, réécrite à chaque run : pas une modification
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    key INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    keyword TEXT,
+    published TEXT,
+    first_seen TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    last_run INTEGER NOT NULL,
+    run_pos INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS items_seq ON items (seq);
+CREATE INDEX IF NOT EXISTS items_source ON items (source, seq);
+CREATE INDEX IF NOT EXISTS items_keyword ON items (keyword, seq);
+CREATE INDEX IF NOT EXISTS items_published ON items (published);
+CREATE INDEX IF NOT EXISTS items_updated ON items (updated_at);
+CREATE INDEX IF NOT EXISTS items_run ON items (last_run, run_pos);
+
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+"""
+
+def _signed(value):
+    """Entier 64 bits non signé -> signé (type INTEGER de SQLite)"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+def item_key(item):
+    """Clé de l'item dans le store (clé canonique 64 bits, signée)"""
+    return _signed(veille_dedup.item_key(item))
+
+def _same_data(stored, item):
+    """Vrai si l'item n'a pas changé depuis son dernier enregistrement (hors RUN_FIELDS)"""
+    stored = json.loads(stored)
+    return all(stored.get(field) == item.get(field)
+               for field in stored.keys() | item.keys() if field not in RUN_FIELDS)
+
+def published_date(value):
+    """
+    Date de publication en ISO UTC (2026-03-01T12:00:00Z), comparable comme
+    chaîne : ISO des API (Reddit, HN), pubDate RSS (RFC 822). None si
+    illisible ("Cette semaine" des résultats Google).
+    """
+    timestamp = veille_dates.parse_pub_date(value)
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+class ItemStore:
+    """Items indexés + runs (date et résumé de chaque veille)"""
+
+    def __init__(self, name=STORE_FILE):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(veille_state.state_path(name), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+
+        # Dates de publication brutes des versions précédentes : converties une fois
+        with self.lock, self.db:
+            rows = self.db.execute(
+                "SELECT key, published FROM items WHERE published NOT LIKE '____-__-__T__:__:__Z'"
+            ).fetchall()
+            self.db.executemany('UPDATE items SET published = ? WHERE key = ?',
+                                [(published_date(published), key) for key, published in rows])
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def last_seq(self):
+        """Séquence du dernier item inséré ou modifié (0 si vide)"""
+        with self.lock:
+            return self.db.execute('SELECT COALESCE(MAX(seq), 0) FROM items').fetchone()[0]
+
+    def ingest(self, all_data):
+        """
+        Enregistre un run (format veille-latest.json) : nouveaux items insérés,
+        items modifiés réécrits, items inchangés seulement rattachés au run.
+        Retourne (run_id, {source: {'new': n, 'updated': n}}).
+        """
+        date = all_data.get('date') or datetime.now().isoformat()
+        counts = {}
+
+        with self.lock, self.db:
+            run_id = self.db.execute(
+                'INSERT INTO runs (date, summary) VALUES (?, ?)',
+                (date, json.dumps(all_data.get('summary') or {}, ensure_ascii=False))
+            ).lastrowid
+            seq = self.db.execute('SELECT COALESCE(MAX(seq), 0) FROM items').fetchone()[0]
+            window_start = self._window_start(run_id, date)
+
+            for source in SOURCES:
+                counts[source] = {'new': 0, 'updated': 0}
+
+                for pos, item in enumerate(all_data.get(source, [])):
+                    key = item_key(item)
+                    version = _signed(veille_dedup.item_version(item))
+                    row = self.db.execute(
+                        'SELECT version, data, seq, last_run FROM items WHERE key = ?', (key,)
+                    ).fetchone()
+
+                    if row and row[0] == version:
+                        # Même version : seuls les scores ont pu changer, ou l'item revient
+                        # dans la fenêtre de la semaine (nouvelle séquence pour les clients
+                        # delta, mais ni "modifié" ni archive du jour)
+                        item_seq = row[2]
+                        if not _same_data(row[1], item) or row[3] < window_start:
+                            seq += 1
+                            item_seq = seq
+                        self.db.execute(
+                            'UPDATE items SET seq = ?, last_run = ?, run_pos = ?, data = ? WHERE key = ?',
+                            (item_seq, run_id, pos, json.dumps(item, ensure_ascii=False), key)
+                        )
+                        continue
+
+                    seq += 1
+                    fields = (
+                        source, item.get('keyword'), published_date(item.get('created') or item.get('date')),
+                        date, seq, version, run_id, pos, json.dumps(item, ensure_ascii=False)
+                    )
+                    if row:
+                        self.db.execute(
+                            'UPDATE items SET source = ?, keyword = ?, published = ?, updated_at = ?, '
+                            'seq = ?, version = ?, last_run = ?, run_pos = ?, data = ? WHERE key = ?',
+                            fields + (key,)
+                        )
+                        counts[source]['updated'] += 1
+                    else:
+                        self.db.execute(
+                            'INSERT INTO items (source, keyword, published, first_seen, updated_at, '
+                            'seq, version, last_run, run_pos, data, key) '
+                            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                            fields[:4] + (date,) + fields[4:] + (key,)
+                        )
+                        counts[source]['new'] += 1
+
+        return run_id, counts
+
+    def _view(self, run, where, params, order):
+        with self.lock:
+            rows = self.db.execute(
+                f'SELECT source, data FROM items WHERE {where} ORDER BY {order}', params
+            ).fetchall()
+
+        view = {'date': run[0] if run else datetime.now().isoformat()}
+        for source in SOURCES:
+            view[source] = []
+        view['summary'] = json.loads(run[1]) if run else {}
+
+        for source, data in rows:
+            view.setdefault(source, []).append(json.loads(data))
+        return view
+
+    def _run(self, run_id=None):
+        with self.lock:
+            if run_id is None:
+                return self.db.execute('SELECT id, date, summary FROM runs ORDER BY id DESC LIMIT 1').fetchone()
+            return self.db.execute('SELECT id, date, summary FROM runs WHERE id = ?', (run_id,)).fetchone()
+
+    def run_info(self, run_id=None):
+        """Date et résumé d'un run (le dernier par défaut), None s'il n'existe pas"""
+        run = self._run(run_id)
+        if not run:
+            return None
+        return {'id': run[0], 'date': run[1], 'summary': json.loads(run[2])}
+
+    def changes_since(self, seq, limit=500):
+        """
+        Items insérés ou modifiés après la séquence `seq`, par séquence
+        croissante : liste de (seq, key, source, item)
+        """
+        with self.lock:
+            rows = self.db.execute(
+                'SELECT seq, key, source, data FROM items WHERE seq > ? ORDER BY seq LIMIT ?', (seq, limit)
+            ).fetchall()
+        return [(row_seq, key, source, json.loads(data)) for row_seq, key, source, data in rows]
+
+    def set_summary(self, run_id, summary):
+        """Résumé IA d'un run (calculé sur sa vue, après l'ingestion)"""
+        with self.lock, self.db:
+            self.db.execute('UPDATE runs SET summary = ? WHERE id = ?',
+                            (json.dumps(summary, ensure_ascii=False), run_id))
+
+    def _window_start(self, run_id, date, window=LATEST_WINDOW):
+        since = (datetime.fromisoformat(date) - timedelta(seconds=window)).isoformat()
+        return self.db.execute('SELECT MIN(id) FROM runs WHERE date >= ? AND id <= ?', (since, run_id)).fetchone()[0]
+
+    def window_start(self, run_id=None, window=LATEST_WINDOW):
+        """
+        Premier run de la fenêtre de veille-latest.json pour ce run (le
+        dernier par défaut), None s'il n'y a aucun run
+        """
+        run = self._run(run_id)
+        if not run:
+            return None
+        with self.lock:
+            return self._window_start(run[0], run[1], window)
+
+    def left_window(self, start, end):
+        """Vrai si des items vus dans la fenêtre commençant au run `start` n'y sont plus à `end`"""
+        with self.lock:
+            return self.db.execute(
+                'SELECT 1 FROM items WHERE last_run >= ? AND last_run < ? LIMIT 1', (start, end)
+            ).fetchone() is not None
+
+    def latest_view(self, run_id=None, window=LATEST_WINDOW):
+        """
+        Contenu de veille-latest.json : items vus (insérés ou retrouvés) dans
+        les runs des `window` secondes précédant le run (le dernier par
+        défaut), du run le plus récent au plus ancien. Une source interrogée
+        de façon incrémentale, ou absente d'un rafraîchissement partiel,
+        garde ainsi ses items de la semaine.
+        """
+        run = self._run(run_id)
+        if not run:
+            return self._view(None, '0', (), 'seq')
+
+        start = self.window_start(run[0], window)
+        return self._view(run[1:], 'last_run >= ? AND last_run <= ?', (start, run[0]), 'last_run DESC, run_pos')
+
+    def updated_since(self, since, run_id=None):
+        """Items insérés ou modifiés depuis `since` (ISO), ex. archive du jour"""
+        run = self._run(run_id)
+        return self._view(run and run[1:], 'updated_at >= ?', (since,), 'seq')
+
+    def history(self, source=None, keyword=None, start=None, end=None):
+        """
+        Items par source / keyword / date de publication (ISO UTC, ex.
+        '2026-03-01'), du plus récent au plus ancien ; les items sans date
+        connue ne sortent pas d'une recherche par date
+        """
+        clauses, params = [], []
+        for clause, value in (('source = ?', source), ('keyword = ?', keyword),
+                              ('published >= ?', start), ('published < ?', end)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT data FROM items WHERE {' AND '.join(clauses) or '1'} ORDER BY published DESC",
+                params
+            ).fetchall()
+        return [json.loads(data) for data, in rows]
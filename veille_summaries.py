@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Cache des résumés IA
+Clé : hash du modèle, des paramètres et du prompt normalisé (donc des items
+et du gabarit). Un run dont les entrées n'ont pas changé réutilise le
+résumé sans appel API. Seuls les résumés réussis sont mis en cache.
+État dans .veille/summaries.json.
+"""
+
+import hashlib
+import json
+import re
+import time
+
+import veille_state
+
+SUMMARY_CACHE = 'summaries.json'
+MAX_ENTRIES = 200  # Les plus anciens sont retirés au-delà
+
+def normalize_prompt(prompt):
+    """Espaces normalisés (une indentation différente ne change pas la clé)"""
+    return re.sub(r'\s+', ' ', prompt).strip()
+
+def cache_key(model, prompt, **params):
+    """Hash du modèle, des paramètres de génération et du prompt normalisé"""
+    material = json.dumps(
+        {'model': model, 'params': params, 'prompt': normalize_prompt(prompt)},
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.blake2b(material.encode('utf-8'), digest_size=16).hexdigest()
+
+def lookup(key):
+    """Résumé en cache pour cette clé, None sinon"""
+    entry = veille_state.load_state(SUMMARY_CACHE, {}).get(key)
+    return entry['summary'] if entry else None
+
+def store(key, summary):
+    """Mémorise un résumé réussi"""
+    with veille_state.file_lock(SUMMARY_CACHE):
+        entries = veille_state.load_state(SUMMARY_CACHE, {})
+        entries[key] = {'summary': summary, 'time': time.time()}
+
+        if len(entries) > MAX_ENTRIES:
+            newest = sorted(entries.items(), key=lambda item: item[1]['time'])[-MAX_ENTRIES:]
+            entries = dict(newest)
+
+        veille_state.save_state(SUMMARY_CACHE, entries)
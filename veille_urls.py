@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Canonicalisation des URLs d'items
+twitter.com / x.com / mobile.twitter.com / instances Nitter -> ('twitter', status_id),
+Reddit -> ('reddit', id base36), Hacker News -> ('hackernews', item_id).
+item_key() en dérive une clé entière 64 bits, moins coûteuse à stocker et
+à comparer que l'URL.
+"""
+
+import re
+from urllib.parse import urlsplit, parse_qs
+
+# /<user>/status/<id> : twitter.com, x.com, Nitter (n'importe quel hôte)
+TWEET_PATH_RE = re.compile(r'^/(?:#!/)?([A-Za-z0-9_]{1,15})/status(?:es)?/(\d+)')
+REDDIT_PATH_RE = re.compile(r'/comments/([a-z0-9]+)', re.IGNORECASE)
+REDDIT_SHORT_PATH_RE = re.compile(r'^/([a-z0-9]+)/?$', re.IGNORECASE)
+
+# Code plateforme dans les 2 bits de poids faible de la clé
+PLATFORM_CODES = {
+    'twitter': 1,
+    'reddit': 2,
+    'hackernews': 3,
+}
+
+def _host(parts):
+    host = (parts.hostname or '').lower()
+    for prefix in ('www.', 'mobile.', 'old.', 'm.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    return host
+
+def canonical_key(url):
+    """(plateforme, id) d'une URL d'item connue, None sinon"""
+    if not url:
+        return None
+
+    parts = urlsplit(url.strip())
+    host = _host(parts)
+
+    if host == 'news.ycombinator.com' and parts.path == '/item':
+        item_id = parse_qs(parts.query).get('id', [''])[0]
+        return ('hackernews', int(item_id)) if item_id.isdigit() else None
+
+    if host == 'reddit.com' or host.endswith('.reddit.com'):
+        match = REDDIT_PATH_RE.search(parts.path)
+        return ('reddit', int(match.group(1), 36)) if match else None
+
+    if host == 'redd.it':
+        match = REDDIT_SHORT_PATH_RE.match(parts.path)
+        return ('reddit', int(match.group(1), 36)) if match else None
+
+    match = TWEET_PATH_RE.match(parts.path)
+    if match:
+        return ('twitter', int(match.group(2)))
+
+    return None
+
+def tweet_username(url):
+    """Auteur d'une URL de tweet (twitter.com, x.com, Nitter), None sinon"""
+    parts = urlsplit((url or '').strip())
+    match = TWEET_PATH_RE.match(parts.path)
+    return match.group(1) if match else None
+
+def canonical_url(url):
+    """URL stable d'un tweet (https://twitter.com/<user>/status/<id>), sinon l'URL d'origine"""
+    key = canonical_key(url)
+    if key and key[0] == 'twitter':
+        return f"https://twitter.com/{tweet_username(url)}/status/{key[1]}"
+    return url
+
+def item_key(url):
+    """
+    Clé entière 64 bits : (id << 2) | code plateforme pour les items connus,
+    None si l'URL n'est pas reconnue (l'appelant se rabat sur un hash)
+    """
+    key = canonical_key(url)
+    if not key:
+        return None
+
+    platform, item_id = key
+    return ((item_id << 2) | PLATFORM_CODES[platform]) & 0xFFFFFFFFFFFFFFFF